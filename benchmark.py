@@ -1,34 +1,260 @@
-import mysql.connector
-import requests
 import json
+import math
+import statistics
+import sys
 import time
 from datetime import datetime
 import argparse
+import itertools
+import random
 import os
-from typing import Dict, List, Any, Tuple
+import socket
+import threading
+import uuid
+from typing import Dict, List, Any, Tuple, Optional
+from response_store import RESPONSE_CODECS, compress_response, save_response, fetch_response
+from token_trace import save_trace
+import transfer
+from llmbench import add_db_arguments, check_db_arguments, db_config_from_args
+import storage
+
+# requests is imported inside the methods that call Ollama, so reports and
+# queue status calls start without loading it
+
+# Assumed duration of a run (seconds) when there is no history at all
+DEFAULT_RUN_ESTIMATE = 30.0
+# Jobs are not leased again after this many attempts
+JOB_MAX_ATTEMPTS = 3
+# Seconds a worker waits before looking again for jobs held by other workers
+JOB_POLL_INTERVAL = 5.0
+DEFAULT_EMBEDDING_BATCH_SIZES = [1, 8, 32, 128]
+# --quick gives up on a model after this many failed runs in a row
+QUICK_MAX_CONSECUTIVE_FAILURES = 3
+# Models with fewer common prompts are not tested by --compare
+COMPARE_MIN_SAMPLES = 5
+
+# Name patterns of embedding models, which have no completion interface. Only
+# used for Ollama versions whose /api/show does not report capabilities
+EMBEDDING_MODEL_PATTERNS = [
+    'nomic-embed-text',
+    'embed',
+    'embedding',
+    'bge-',
+    'e5-',
+    'sentence-transformers',
+    'all-minilm',
+    'paraphrase-',
+    'distilbert',
+    'instructor-',
+    'gte-',
+    'multilingual-e5'
+]
+
+
+def options_key(options: Optional[Dict[str, Any]]) -> Optional[str]:
+    """
+    Serialize an Ollama options block into a canonical string.
+
+    The same option set always produces the same string, so it can be stored
+    with each result and compared in SQL. Runs with default options map to None.
+    """
+    if not options:
+        return None
+    return json.dumps(options, sort_keys=True, separators=(',', ':'))
+
+
+def is_embedding_model(model: str) -> bool:
+    """Check whether a model name matches one of EMBEDDING_MODEL_PATTERNS."""
+    model_lower = model.lower()
+    return any(pattern in model_lower for pattern in EMBEDDING_MODEL_PATTERNS)
+
+
+def pareto_front(rows: List[Dict[str, Any]], maximize: List[str], minimize: List[str]) -> List[Dict[str, Any]]:
+    """
+    Return the rows not dominated by any other row.
+    
+    A row dominates another if it is at least as good in every metric and
+    strictly better in at least one.
+    """
+    def dominates(a, b):
+        not_worse = all(a[m] >= b[m] for m in maximize) and all(a[m] <= b[m] for m in minimize)
+        better = any(a[m] > b[m] for m in maximize) or any(a[m] < b[m] for m in minimize)
+        return not_worse and better
+    
+    return [row for row in rows if not any(dominates(other, row) for other in rows if other is not row)]
+
+
+def wilcoxon_signed_rank(x: List[float], y: List[float]) -> Tuple[float, float]:
+    """
+    Two-sided Wilcoxon signed-rank test of paired samples using the normal approximation.
+    
+    Zero differences are dropped, tied absolute differences get average ranks
+    and the variance is tie-corrected.
+    
+    Returns:
+        Tuple of (rank sum of the positive differences y - x, p-value)
+    """
+    differences = [b - a for a, b in zip(x, y) if b != a]
+    n = len(differences)
+    if n == 0:
+        return 0.0, 1.0
+    order = sorted(range(n), key=lambda k: abs(differences[k]))
+    
+    ranks = [0.0] * n
+    tie_sum = 0.0
+    i = 0
+    while i < n:
+        j = i
+        while j + 1 < n and abs(differences[order[j + 1]]) == abs(differences[order[i]]):
+            j += 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = (i + j) / 2 + 1
+        ties = j - i + 1
+        tie_sum += ties ** 3 - ties
+        i = j + 1
+        
+    w_plus = sum(rank for rank, difference in zip(ranks, differences) if difference > 0)
+    mean = n * (n + 1) / 4
+    variance = n * (n + 1) * (2 * n + 1) / 24 - tie_sum / 48
+    if variance <= 0:
+        return w_plus, 1.0
+    z = (abs(w_plus - mean) - 0.5) / math.sqrt(variance)
+    return w_plus, min(1.0, math.erfc(max(z, 0.0) / math.sqrt(2)))
+
+
+def stratified_estimate(samples: Dict[str, List[float]], sizes: Dict[str, int]) -> Tuple[float, float]:
+    """
+    Stratified mean and 95% confidence half-width of a metric.
+    
+    Args:
+        samples: Sampled values per stratum
+        sizes: Population size per stratum
+        
+    Returns:
+        Tuple of (mean, half-width), strata without samples are left out
+    """
+    sampled = {stratum: values for stratum, values in samples.items() if values}
+    total = sum(sizes[stratum] for stratum in sampled)
+    if not total:
+        return 0.0, float('inf')
+    mean = 0.0
+    variance = 0.0
+    for stratum, values in sampled.items():
+        weight = sizes[stratum] / total
+        mean += weight * statistics.mean(values)
+        if len(values) > 1:
+            # Finite population correction, a fully sampled stratum has no sampling error
+            fpc = 1 - len(values) / sizes[stratum]
+            variance += weight ** 2 * statistics.variance(values) / len(values) * fpc
+        elif sizes[stratum] > 1:
+            # A single sample of a larger stratum gives no variance estimate
+            variance = float('inf')
+    return mean, 1.96 * math.sqrt(variance)
+
+
+def stratum_priority(samples: Dict[str, Dict[str, List[float]]], sizes: Dict[str, int], stratum: str) -> float:
+    """Relative variance contribution of a stratum summed over its metrics, used to place the next sample."""
+    priority = 0.0
+    for values in samples[stratum].values():
+        if len(values) > 1 and statistics.mean(values):
+            priority += sizes[stratum] ** 2 * statistics.variance(values) / len(values) / statistics.mean(values) ** 2
+    return priority
+
+
+def format_duration(seconds: float) -> str:
+    """Format a duration in seconds as e.g. '1h 02m 03s'."""
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m {seconds:02d}s"
+    return f"{minutes}m {seconds:02d}s"
+
+
+def parse_grid(specs: List[str]) -> Dict[str, List[Any]]:
+    """
+    Parse grid specifications such as ``num_thread=4,8`` into value lists.
+
+    Values are JSON literals (``use_mmap=true,false``, ``stop=["\\n"],["###"]``),
+    anything else is taken as a string (``num_gpu=all``).
+
+    Args:
+        specs: List of ``name=value1,value2,...`` strings
+
+    Returns:
+        Dictionary mapping option names to lists of candidate values
+    """
+    grid = {}
+    for spec in specs:
+        name, sep, values = spec.partition('=')
+        if not sep or not name or not values:
+            raise ValueError(f"Invalid grid specification '{spec}', expected name=value1,value2")
+        try:
+            # The whole list at once, so JSON arrays and quoted strings may contain commas
+            parsed = json.loads(f"[{values}]")
+        except ValueError:
+            parsed = []
+            for value in values.split(','):
+                try:
+                    parsed.append(json.loads(value))
+                except ValueError:
+                    parsed.append(value.strip())
+        grid[name.strip()] = parsed
+    return grid
+
+
+def build_grid(grid: Dict[str, List[Any]], sample: int = None, seed: int = None) -> List[Dict[str, Any]]:
+    """
+    Expand a parameter grid into the list of option sets to benchmark.
+
+    Args:
+        grid: Dictionary mapping option names to candidate values
+        sample: Optional number of option sets to draw at random from the full product
+        seed: Optional random seed, so a sampled subset can be reproduced
+
+    Returns:
+        List of option dictionaries
+    """
+    names = sorted(grid)
+    points = [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+    if sample and sample < len(points):
+        points = random.Random(seed).sample(points, sample)
+    return points
+
 
 class LLMBenchmark:
-    def __init__(self, db_config: Dict[str, str], ollama_base_url: str = "http://localhost:11434"):
+    def __init__(self, db_config: Dict[str, str], ollama_base_url: str = "http://localhost:11434", response_codec: str = 'zlib', request_timeout: float = None, max_tokens: int = None, trace_tokens: bool = False):
         """
         Initialize the LLM benchmarking framework.
         
         Args:
             db_config: Dictionary with MySQL connection parameters
             ollama_base_url: Base URL for Ollama API
+            response_codec: Compression used for stored responses ('zlib' or 'zstd')
+            request_timeout: Optional wall-clock budget per request in seconds
+            max_tokens: Optional token budget per request (Ollama num_predict)
+            trace_tokens: Whether to record the arrival time of every streamed token
         """
         self.db_config = db_config
         self.ollama_base_url = ollama_base_url
+        self.response_codec = response_codec
+        self.request_timeout = request_timeout
+        self.max_tokens = max_tokens
+        self.trace_tokens = trace_tokens
+        self.run_id = None
+        # Optional gemini_evaluate.EvaluationPipeline fed with every saved result
+        self.evaluation_pipeline = None
         self.conn = None
         self.cursor = None
         
     def connect_db(self) -> None:
-        """Establish connection to MySQL database."""
+        """Establish connection to the MySQL or SQLite database."""
         try:
-            self.conn = mysql.connector.connect(**self.db_config)
+            self.conn = storage.connect(self.db_config)
             self.cursor = self.conn.cursor(dictionary=True)
-            print("Successfully connected to MySQL database")
-        except mysql.connector.Error as err:
-            print(f"Error connecting to MySQL database: {err}")
+            print(f"Successfully connected to database {storage.database_name(self.db_config)}")
+        except storage.Error as err:
+            print(f"Error connecting to database: {err}")
             raise
             
     def close_db(self) -> None:
@@ -65,46 +291,61 @@ class LLMBenchmark:
         print(f"Retrieved {len(prompts)} prompts from database")
         return prompts
     
-    def get_models(self) -> List[str]:
+    def get_model_capabilities(self, model: str) -> Optional[List[str]]:
+        """
+        Ask Ollama what a model can do ('completion', 'embedding', 'vision', ...).
+        
+        Args:
+            model: Name of the model
+            
+        Returns:
+            List of capabilities from /api/show, or None if Ollama does not report them
+        """
+        import requests
+        
+        try:
+            response = requests.post(f"{self.ollama_base_url}/api/show", json={"model": model}, timeout=10)
+            if response.status_code != 200:
+                return None
+            return response.json().get('capabilities')
+        except (requests.exceptions.RequestException, ValueError):
+            return None
+            
+    def get_models(self, embedding: bool = False) -> List[str]:
         """
-        Get available models from Ollama, filtering out blacklisted models.
+        Get available models from Ollama, split into completion and embedding models.
+        
+        The split uses the capabilities reported by /api/show, and falls back to
+        EMBEDDING_MODEL_PATTERNS for Ollama versions that do not report them.
+        
+        Args:
+            embedding: Whether to return embedding models instead of completion models
         
         Returns:
-            List of model names that support completion interface
-        """
-        # Define blacklisted model patterns/names
-        blacklisted_patterns = [
-            'nomic-embed-text',
-            'embed',
-            'embedding',
-            'bge-',
-            'e5-',
-            'sentence-transformers',
-            'all-minilm',
-            'paraphrase-',
-            'distilbert',
-            'instructor-',
-            'gte-',
-            'multilingual-e5'
-        ]
+            List of model names that support the requested interface
+        """
+        import requests
         
         try:
             response = requests.get(f"{self.ollama_base_url}/api/tags")
             if response.status_code == 200:
                 all_models = [model['name'] for model in response.json()['models']]
                 
-                # Filter out blacklisted models
+                # Embedding models have no completion interface and vice versa
                 filtered_models = []
                 for model in all_models:
-                    model_lower = model.lower()
-                    is_blacklisted = any(pattern.lower() in model_lower for pattern in blacklisted_patterns)
-                    
-                    if not is_blacklisted:
-                        filtered_models.append(model)
+                    capabilities = self.get_model_capabilities(model)
+                    if capabilities is None:
+                        supported = is_embedding_model(model) == embedding
                     else:
+                        supported = ('embedding' if embedding else 'completion') in capabilities
+                    if supported:
+                        filtered_models.append(model)
+                    elif not embedding:
                         print(f"Filtered out model: {model} (no completion interface)")
                 
-                print(f"Available completion models: {', '.join(filtered_models)}")
+                kind = "embedding" if embedding else "completion"
+                print(f"Available {kind} models: {', '.join(filtered_models)}")
                 return filtered_models
             else:
                 print(f"Error retrieving models: {response.status_code}")
@@ -114,130 +355,517 @@ class LLMBenchmark:
             print(f"Network error retrieving models: {e}")
             return []
             
-    def check_result_exists(self, prompt_id: int, model: str) -> bool:
+    def get_environment_fingerprint(self) -> Dict[str, Any]:
         """
-        Check if a result already exists for a specific prompt and model.
+        Describe the environment results are produced in.
         
-        Args:
-            prompt_id: ID of the prompt
-            model: Name of the model
-            
         Returns:
-            True if result exists, False otherwise
+            Dictionary with host name, Ollama URL and version, and the digest of
+            every model Ollama has installed
         """
-        query = """
-            SELECT COUNT(*) as count
-            FROM benchmark_results
-            WHERE prompt_id = %s AND model = %s
+        import requests
+        
+        fingerprint = {
+            "host": socket.gethostname(),
+            "ollama_url": self.ollama_base_url,
+            "ollama_version": None,
+            "model_digests": {}
+        }
+        try:
+            response = requests.get(f"{self.ollama_base_url}/api/version", timeout=10)
+            if response.status_code == 200:
+                fingerprint['ollama_version'] = response.json().get('version')
+            response = requests.get(f"{self.ollama_base_url}/api/tags", timeout=10)
+            if response.status_code == 200:
+                fingerprint['model_digests'] = {model['name']: model.get('digest') for model in response.json()['models']}
+        except requests.exceptions.RequestException as e:
+            print(f"Network error reading Ollama environment: {e}")
+        return fingerprint
+        
+    def start_run(self, settings: Dict[str, Any]) -> int:
         """
-        self.cursor.execute(query, (prompt_id, model))
-        result = self.cursor.fetchone()
-        return result['count'] > 0
+        Record a new benchmark run; results saved afterwards are linked to it.
+        
+        Args:
+            settings: Run settings stored with the run (mode, option grid, budgets)
             
-    def run_prompt(self, model: str, prompt: Dict[str, Any]) -> Dict[str, Any]:
+        Returns:
+            ID of the run
+        """
+        fingerprint = self.get_environment_fingerprint()
+        self.cursor.execute("""
+            INSERT INTO benchmark_runs
+            (host, ollama_url, ollama_version, model_digests, options, started_at)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, (
+            fingerprint['host'],
+            fingerprint['ollama_url'],
+            fingerprint['ollama_version'],
+            json.dumps(fingerprint['model_digests']),
+            json.dumps(settings, sort_keys=True),
+            datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        ))
+        self.conn.commit()
+        self.run_id = self.cursor.lastrowid
+        print(f"Started benchmark run {self.run_id} on {fingerprint['host']} (Ollama {fingerprint['ollama_version']})")
+        return self.run_id
+        
+    def finish_run(self) -> None:
+        """Mark the current benchmark run as finished."""
+        if self.run_id is None:
+            return
+        self.cursor.execute(
+            "UPDATE benchmark_runs SET finished_at = %s WHERE id = %s",
+            (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), self.run_id)
+        )
+        self.conn.commit()
+        
+    def run_prompt(self, model: str, prompt: Dict[str, Any], options: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         Send a prompt to a model and get the response with metrics.
         
+        The response is streamed so the wall-clock budget (request_timeout) can be
+        enforced while the model is generating. On expiry the connection is closed,
+        which makes Ollama abort the generation, and the partial result is returned
+        with status 'timeout'. Generations stopped by the token budget (max_tokens)
+        get status 'truncated'. With trace_tokens the arrival time of every token
+        is returned as 'token_arrivals' (seconds since the request was sent).
+        An {"error": ...} line in the stream, or a stream that ends without the
+        final done chunk, gives status 'error'.
+        
         Args:
             model: Name of the LLM model to use
             prompt: Prompt dictionary with 'id' and 'prompt_text'
+            options: Optional Ollama runtime options (num_thread, num_ctx, ...)
             
         Returns:
             Dictionary with response and metrics
         """
+        import requests
+        
         print(f"Running prompt {prompt['id']} on model {model}")
         
+        request_options = dict(options or {})
+        if self.max_tokens and 'num_predict' not in request_options:
+            request_options['num_predict'] = self.max_tokens
+        
         request_data = {
             "model": model,
             "prompt": prompt['prompt_text'],
-            "stream": False
+            "stream": True
+        }
+        if request_options:
+            request_data["options"] = request_options
+        
+        result = {
+            "prompt_id": prompt['id'],
+            "model": model,
+            "options": options_key(options),
+            "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
         
+        chunks = []
+        arrivals = []
+        response_data = {}
+        status = 'ok'
+        error = None
+        expired = threading.Event()
+        watchdog = None
+        trace_start = time.perf_counter()
         start_time = time.time()
-        response = requests.post(
-            f"{self.ollama_base_url}/api/generate", 
-            json=request_data
-        )
+        deadline = start_time + self.request_timeout if self.request_timeout else None
+        try:
+            # The read timeout also bounds a stall before the first token (model load, prefill)
+            with requests.post(
+                f"{self.ollama_base_url}/api/generate", 
+                json=request_data,
+                stream=True,
+                timeout=(min(10, self.request_timeout or 10), self.request_timeout)
+            ) as response:
+                if response.status_code != 200:
+                    print(f"Error calling Ollama API: {response.status_code}")
+                    result.update(success=False, status='error', error=f"API Error: {response.status_code}")
+                    return result
+                    
+                if deadline:
+                    # A read blocked in a stall would only time out a full request_timeout
+                    # later, so the socket is shut down from a timer when the budget runs
+                    # out; shutdown (unlike close) wakes up the blocked read
+                    def cancel():
+                        expired.set()
+                        try:
+                            with socket.fromfd(response.raw.fileno(), socket.AF_INET, socket.SOCK_STREAM) as sock:
+                                sock.shutdown(socket.SHUT_RDWR)
+                        except (OSError, ValueError):
+                            # Already closed
+                            pass
+                        response.close()
+                    watchdog = threading.Timer(max(deadline - time.time(), 0), cancel)
+                    watchdog.daemon = True
+                    watchdog.start()
+                    
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    if 'error' in data:
+                        # Ollama reports failures during generation as a final {"error": ...} line
+                        error = f"Ollama Error: {data['error']}"
+                        break
+                    if self.trace_tokens and data.get('response'):
+                        arrivals.append(time.perf_counter() - trace_start)
+                    chunks.append(data.get('response', ''))
+                    if data.get('done'):
+                        response_data = data
+                        break
+                    if deadline and time.time() > deadline:
+                        status = 'timeout'
+                        break
+        except Exception as e:
+            if expired.is_set() or isinstance(e, requests.exceptions.Timeout):
+                status = 'timeout'
+            elif isinstance(e, requests.exceptions.RequestException):
+                print(f"Network error calling Ollama API: {e}")
+                result.update(success=False, status='error', error=f"Network Error: {e}")
+                return result
+            elif isinstance(e, ValueError):
+                # Malformed JSON line
+                error = f"Invalid response from Ollama: {e}"
+            else:
+                raise
+        finally:
+            if watchdog:
+                watchdog.cancel()
         end_time = time.time()
+        if self.trace_tokens:
+            result['token_arrivals'] = arrivals
         
-        if response.status_code != 200:
-            print(f"Error calling Ollama API: {response.status_code}")
-            return {
-                "prompt_id": prompt['id'],
-                "model": model,
-                "success": False,
-                "error": f"API Error: {response.status_code}"
-            }
-            
-        response_data = response.json()
+        if status == 'timeout':
+            print(f"  - Prompt {prompt['id']} timed out after {end_time - start_time:.1f}s, generation cancelled")
+            result.update(
+                success=False,
+                status='timeout',
+                error=f"Timeout after {self.request_timeout}s",
+                response_text=''.join(chunks),
+                total_duration=end_time - start_time,
+                eval_count=len(chunks)
+            )
+            return result
         
-        result = {
-            "prompt_id": prompt['id'],
-            "model": model,
+        if error is None and not response_data:
+            error = "Stream ended without the final done chunk"
+        if error is not None:
+            print(f"  - Prompt {prompt['id']} failed: {error}")
+            result.update(
+                success=False,
+                status='error',
+                error=error,
+                response_text=''.join(chunks),
+                total_duration=end_time - start_time,
+                eval_count=len(chunks)
+            )
+            return result
+        
+        if response_data.get('done_reason') == 'length':
+            status = 'truncated'
+        
+        result.update({
             "success": True,
-            "response_text": response_data.get('response', ''),
+            "status": status,
+            "response_text": ''.join(chunks),
             "total_duration": end_time - start_time,
             "eval_count": response_data.get('eval_count', 0),
             "eval_duration": response_data.get('eval_duration', 0),
             "load_duration": response_data.get('load_duration', 0),
             "prompt_eval_count": response_data.get('prompt_eval_count', 0),
-            "prompt_eval_duration": response_data.get('prompt_eval_duration', 0),
-            "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
+            "prompt_eval_duration": response_data.get('prompt_eval_duration', 0)
+        })
         
         return result
     
-    def save_result(self, result: Dict[str, Any]) -> int:
+    def save_result(self, result: Dict[str, Any], commit: bool = True) -> int:
         """
         Save benchmark result to database.
         
         Args:
             result: Dictionary with response and metrics
+            commit: Whether to commit, False lets the caller add statements to the transaction
             
         Returns:
             ID of inserted record
         """
-        if not result['success']:
-            query = """
-                INSERT INTO benchmark_results 
-                (prompt_id, model, success, error, timestamp)
-                VALUES (%s, %s, %s, %s, %s)
-            """
-            values = (
-                result['prompt_id'],
-                result['model'],
-                result['success'],
-                result.get('error', ''),
-                result['timestamp']
-            )
-        else:
-            query = """
-                INSERT INTO benchmark_results 
-                (prompt_id, model, success, response_text, total_duration, 
-                eval_count, eval_duration, load_duration, 
-                prompt_eval_count, prompt_eval_duration, timestamp)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            values = (
-                result['prompt_id'],
-                result['model'],
-                result['success'],
-                result['response_text'],
-                result['total_duration'],
-                result['eval_count'],
-                result['eval_duration'],
-                result['load_duration'],
-                result['prompt_eval_count'],
-                result['prompt_eval_duration'],
-                result['timestamp']
-            )
+        query = """
+            INSERT INTO benchmark_results 
+            (run_id, prompt_id, model, options, success, status, error, total_duration, 
+            eval_count, eval_duration, load_duration, 
+            prompt_eval_count, prompt_eval_duration, timestamp)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """
+        values = (
+            self.run_id,
+            result['prompt_id'],
+            result['model'],
+            result.get('options'),
+            result['success'],
+            result.get('status'),
+            result.get('error'),
+            result.get('total_duration'),
+            result.get('eval_count'),
+            result.get('eval_duration'),
+            result.get('load_duration'),
+            result.get('prompt_eval_count'),
+            result.get('prompt_eval_duration'),
+            result['timestamp']
+        )
             
         self.cursor.execute(query, values)
-        self.conn.commit()
+        result_id = self.cursor.lastrowid
         
-        return self.cursor.lastrowid
+        # The response body goes to the compressed side table in the same transaction
+        if result.get('response_text') is not None:
+            save_response(self.conn, result_id, result['response_text'], self.response_codec)
+        if result.get('token_arrivals'):
+            save_trace(self.conn, result_id, result['token_arrivals'])
+        if commit:
+            self.conn.commit()
+        
+        return result_id
+        
+    def get_response_text(self, result_id: int) -> Optional[str]:
+        """
+        Load the response text of a benchmark result.
+        
+        Args:
+            result_id: ID of the benchmark result
+            
+        Returns:
+            Decompressed response text, or None if the result has no response
+        """
+        return fetch_response(self.conn, result_id)
+        
+    def migrate_responses(self, batch_size: int = 1000) -> None:
+        """
+        Move inline benchmark_results.response_text into benchmark_responses.
+        
+        Responses are compressed and copied in batches of batch_size and the
+        column is dropped at the end, only after checking that every inline
+        response has a body in benchmark_responses. The migration can be
+        interrupted and restarted, results that already have a body (copied
+        earlier or saved by a newer version) are skipped.
+        
+        Args:
+            batch_size: Number of responses copied per transaction
+        """
+        try:
+            self.connect_db()
+            
+            if 'response_text' not in transfer.table_columns(self.cursor, 'benchmark_results'):
+                print("benchmark_results has no response_text column, nothing to migrate")
+                return
+            
+            # benchmark_responses may already hold newer results, so progress is tracked
+            # by result id and rows with a body are excluded through the anti-join
+            last_id = 0
+            migrated = 0
+            while True:
+                self.cursor.execute("""
+                    SELECT r.id, r.response_text
+                    FROM benchmark_results r
+                    LEFT JOIN benchmark_responses resp ON resp.result_id = r.id
+                    WHERE r.id > %s AND r.response_text IS NOT NULL AND resp.result_id IS NULL
+                    ORDER BY r.id
+                    LIMIT %s
+                """, (last_id, batch_size))
+                rows = self.cursor.fetchall()
+                if not rows:
+                    break
+                    
+                self.cursor.executemany(
+                    "INSERT IGNORE INTO benchmark_responses (result_id, codec, response_body) VALUES (%s, %s, %s)",
+                    [(row['id'], self.response_codec, compress_response(row['response_text'], self.response_codec)) for row in rows]
+                )
+                self.conn.commit()
+                last_id = rows[-1]['id']
+                migrated += len(rows)
+                print(f"  - {migrated} responses migrated (up to result ID {last_id})")
+                
+            self.cursor.execute("""
+                SELECT COUNT(*) as count
+                FROM benchmark_results r
+                LEFT JOIN benchmark_responses resp ON resp.result_id = r.id
+                WHERE r.response_text IS NOT NULL AND resp.result_id IS NULL
+            """)
+            remaining = self.cursor.fetchone()['count']
+            if remaining:
+                print(f"{remaining} inline responses were not copied, keeping benchmark_results.response_text")
+                return
+                
+            print("Dropping benchmark_results.response_text")
+            self.cursor.execute("ALTER TABLE benchmark_results DROP COLUMN response_text")
+            print(f"Migration completed, {migrated} responses moved to benchmark_responses")
+            
+        except Exception as e:
+            print(f"Error migrating responses: {str(e)}")
+        finally:
+            self.close_db()
+        
+    def get_missing_pairs(self, models: List[str], prompts: List[Dict[str, Any]], option_sets: List[Dict[str, Any]], subset: bool) -> List[Tuple[str, Optional[str], int]]:
+        """
+        Find (model, options, prompt) combinations without a stored result.
+        
+        All combinations are checked with a single anti-join instead of one
+        existence query per pair.
+        
+        Args:
+            models: Models to check
+            prompts: Prompts to check
+            option_sets: Ollama option sets to check, None for defaults
+            subset: Whether prompts is a subset of the prompts table
+            
+        Returns:
+            List of (model, options key, prompt ID) tuples
+        """
+        work = [(model, options_key(options)) for model in models for options in option_sets]
+        work_table = " UNION ALL ".join(["SELECT %s AS model, CAST(%s AS CHAR) AS options"] * len(work))
+        params = [value for pair in work for value in pair]
+        
+        query = f"""
+            SELECT w.model, w.options, p.id AS prompt_id
+            FROM ({work_table}) w
+            CROSS JOIN prompts p
+            LEFT JOIN benchmark_results r
+                ON r.prompt_id = p.id AND r.model = w.model AND r.options <=> w.options
+            WHERE r.id IS NULL
+        """
+        if subset:
+            query += f" AND p.id IN ({', '.join(['%s'] * len(prompts))})"
+            params += [prompt['id'] for prompt in prompts]
+            
+        self.cursor.execute(query, params)
+        return [(row['model'], row['options'], row['prompt_id']) for row in self.cursor.fetchall()]
+        
+    def get_cost_estimates(self) -> Dict[str, Any]:
+        """
+        Aggregate historical durations used to estimate the cost of future runs.
+        
+        Returns:
+            Dictionary with per (model, category) run time, per model load time
+            and global fallbacks, all in seconds
+        """
+        self.cursor.execute("""
+            SELECT r.model, p.category,
+                   COUNT(*) as runs,
+                   AVG(r.total_duration - COALESCE(r.load_duration, 0) / 1e9) as avg_run,
+                   MAX(COALESCE(r.load_duration, 0)) / 1e9 as max_load
+            FROM benchmark_results r
+            JOIN prompts p ON r.prompt_id = p.id
+            WHERE r.total_duration IS NOT NULL
+            GROUP BY r.model, p.category
+        """)
+        rows = self.cursor.fetchall()
         
-    def run_benchmark(self, models: List[str] = None, prompt_limit: int = None, force_regenerate: bool = False, specific_prompt_id: int = None) -> None:
+        estimates = {"run": {}, "model_run": {}, "category_run": {}, "load": {}, "default_run": DEFAULT_RUN_ESTIMATE, "default_load": 0.0}
+        model_totals = {}
+        category_totals = {}
+        for row in rows:
+            runs = row['runs']
+            avg_run = max(float(row['avg_run'] or 0), 0.0)
+            estimates['run'][(row['model'], row['category'])] = avg_run
+            estimates['load'][row['model']] = max(estimates['load'].get(row['model'], 0.0), float(row['max_load'] or 0))
+            for totals, key in ((model_totals, row['model']), (category_totals, row['category'])):
+                total, count = totals.get(key, (0.0, 0))
+                totals[key] = (total + avg_run * runs, count + runs)
+                
+        estimates['model_run'] = {key: total / count for key, (total, count) in model_totals.items()}
+        estimates['category_run'] = {key: total / count for key, (total, count) in category_totals.items()}
+        if rows:
+            all_total = sum(total for total, _ in model_totals.values())
+            all_count = sum(count for _, count in model_totals.values())
+            estimates['default_run'] = all_total / all_count
+            estimates['default_load'] = sum(estimates['load'].values()) / len(estimates['load'])
+        return estimates
+        
+    def plan_work(self, models: List[str], prompts: List[Dict[str, Any]], option_sets: List[Dict[str, Any]], force_regenerate: bool = False, subset: bool = False, order: str = None) -> Dict[str, Any]:
+        """
+        Build the ordered list of runs still to do, with estimated durations.
+        
+        A run is estimated from the historical average for its model and prompt
+        category, falling back to the model average, the category average across
+        models and finally the global average. Each (model, options) group pays
+        the model's largest observed load time once.
+        
+        Args:
+            models: Models to benchmark
+            prompts: Prompts to benchmark
+            option_sets: Ollama option sets, None for defaults
+            force_regenerate: Whether to include pairs that already have results
+            subset: Whether prompts is a subset of the prompts table
+            order: None to keep the given order, 'pairs' to finish the most pairs
+                soonest (cheapest models and prompts first), 'models' to finish
+                whole models soonest (smallest total model cost first)
+            
+        Returns:
+            Dictionary with the ordered 'items', per-group 'groups' and 'total_estimate'
+        """
+        options_by_key = {options_key(options): options for options in option_sets}
+        
+        if force_regenerate:
+            pairs = {(model, key, prompt['id']) for model in models for key in options_by_key for prompt in prompts}
+        else:
+            pairs = set(self.get_missing_pairs(models, prompts, option_sets, subset))
+            
+        estimates = self.get_cost_estimates()
+        
+        def run_estimate(model, category):
+            for value in (estimates['run'].get((model, category)),
+                          estimates['model_run'].get(model),
+                          estimates['category_run'].get(category)):
+                if value is not None:
+                    return value
+            return estimates['default_run']
+        
+        groups = []
+        for model in models:
+            for key in options_by_key:
+                items = [
+                    {"model": model, "options": options_by_key[key], "prompt": prompt,
+                     "estimate": run_estimate(model, prompt['category'])}
+                    for prompt in prompts if (model, key, prompt['id']) in pairs
+                ]
+                if not items:
+                    continue
+                if order == 'pairs':
+                    items.sort(key=lambda item: item['estimate'])
+                load = estimates['load'].get(model, estimates['default_load'])
+                items[0]['estimate'] += load
+                groups.append({
+                    "model": model,
+                    "options": key,
+                    "pairs": len(items),
+                    "estimate": sum(item['estimate'] for item in items),
+                    "items": items
+                })
+                
+        if order == 'pairs':
+            groups.sort(key=lambda group: group['estimate'] / group['pairs'])
+        elif order == 'models':
+            groups.sort(key=lambda group: group['estimate'])
+            
+        return {
+            "items": [item for group in groups for item in group['items']],
+            "groups": groups,
+            "total_estimate": sum(group['estimate'] for group in groups)
+        }
+        
+    def print_plan(self, plan: Dict[str, Any]) -> None:
+        """Print the per-model breakdown and total ETA of a run plan."""
+        print(f"\n{'Model':<40} {'Options':<40} {'Pairs':>7} {'Estimate':>12}")
+        for group in plan['groups']:
+            print(f"{group['model']:<40} {group['options'] or 'defaults':<40} {group['pairs']:>7} {format_duration(group['estimate']):>12}")
+        finish = datetime.fromtimestamp(time.time() + plan['total_estimate']).strftime('%Y-%m-%d %H:%M')
+        print(f"\nTotal: {len(plan['items'])} pairs, estimated {format_duration(plan['total_estimate'])} (finish around {finish})")
+            
+    def run_benchmark(self, models: List[str] = None, prompt_limit: int = None, force_regenerate: bool = False, specific_prompt_id: int = None, option_grid: List[Dict[str, Any]] = None, order: str = None, plan_only: bool = False) -> None:
         """
         Run benchmark across all models and prompts.
         
@@ -246,6 +874,9 @@ class LLMBenchmark:
             prompt_limit: Optional limit on number of prompts to use
             force_regenerate: Whether to regenerate answers even if they exist
             specific_prompt_id: Optional specific prompt ID to benchmark
+            option_grid: Optional list of Ollama option sets, every prompt is run once per set
+            order: Work order, see plan_work
+            plan_only: Whether to print the plan and ETA without running anything
         """
         try:
             self.connect_db()
@@ -262,116 +893,1345 @@ class LLMBenchmark:
                 print("No prompts found in database")
                 return
                 
-            print(f"Starting benchmark with {len(models)} models and {len(prompts)} prompts")
+            option_sets = option_grid or [None]
+            subset = specific_prompt_id is not None or bool(prompt_limit)
+            plan = self.plan_work(models, prompts, option_sets, force_regenerate, subset, order)
+            self.print_plan(plan)
+            if plan_only:
+                return
+                
+            self.start_run({"mode": "generate", "option_grid": option_grid, "request_timeout": self.request_timeout, "max_tokens": self.max_tokens})
+            print(f"\nStarting benchmark with {len(models)} models, {len(prompts)} prompts and {len(option_sets)} option sets")
             
-            for model in models:
-                print(f"\nBenchmarking model: {model}")
-                for prompt in prompts:
-                    # Check if result exists and if we should skip
-                    if not force_regenerate and self.check_result_exists(prompt['id'], model):
-                        print(f"  - Prompt {prompt['id']} already has results for model {model}, skipping")
-                        continue
-                    
-                    result = self.run_prompt(model, prompt)
-                    result_id = self.save_result(result)
-                    print(f"  - Prompt {prompt['id']} completed, result ID: {result_id}")
+            current_group = None
+            remaining = plan['total_estimate']
+            estimated_done = 0.0
+            started = time.time()
+            for item in plan['items']:
+                model, options, prompt = item['model'], item['options'], item['prompt']
+                if (model, options_key(options)) != current_group:
+                    current_group = (model, options_key(options))
+                    print(f"\nBenchmarking model: {model}")
+                    if options:
+                        print(f"Options: {options_key(options)}")
+                
+                result = self.run_prompt(model, prompt, options)
+                result_id = self.save_result(result)
+                if self.evaluation_pipeline and result['success']:
+                    self.evaluation_pipeline.submit(result_id, prompt['prompt_text'], result['response_text'])
+                
+                # Scale the remaining estimate by how far off the estimates were so far
+                remaining -= item['estimate']
+                estimated_done += item['estimate']
+                elapsed = time.time() - started
+                eta = remaining * (elapsed / estimated_done if estimated_done else 1.0)
+                print(f"  - Prompt {prompt['id']} completed, result ID: {result_id}, ETA {format_duration(eta)}")
                     
-            print("\nBenchmark completed successfully")
+            self.finish_run()
+            print(f"\nBenchmark completed successfully in {format_duration(time.time() - started)}")
             
         except Exception as e:
             print(f"Error running benchmark: {str(e)}")
         finally:
             self.close_db()
             
-    def generate_report(self) -> Dict[str, Any]:
+    def run_quick_benchmark(self, models: List[str] = None, ci_width: float = 0.10, min_per_category: int = 2, max_samples: int = None, seed: int = None) -> Dict[str, Any]:
         """
-        Generate a simple benchmark report.
+        Screen models on a stratified sample of prompts with early stopping.
         
+        Prompts are stratified by category. Every category first gets
+        min_per_category samples, then each further sample goes to the category
+        contributing most to the variance of the stratified means. Sampling stops
+        once the 95% confidence intervals of decode tokens/sec and latency
+        (excluding model load) are within ±ci_width of their means, when the
+        prompts run out or after max_samples prompts were tried (failed and
+        timed-out runs count too). A model is given up after
+        QUICK_MAX_CONSECUTIVE_FAILURES failed runs in a row. Prompts that
+        already have a result for the model are reused instead of being run again.
+        
+        Args:
+            models: List of models to screen, defaults to all available
+            ci_width: Target relative half-width of the confidence intervals
+            min_per_category: Samples per category before early stopping applies
+            max_samples: Optional maximum number of prompts tried per model
+            seed: Optional random seed for the prompt sample
+            
         Returns:
-            Dictionary with benchmark statistics
+            Dictionary with the estimates and their sampling error per model
         """
         try:
             self.connect_db()
             
-            # Get models stats
-            self.cursor.execute("""
-                SELECT model, 
-                       COUNT(*) as total_prompts,
-                       AVG(total_duration) as avg_duration,
-                       AVG(eval_count) as avg_eval_count,
-                       MIN(total_duration) as min_duration,
-                       MAX(total_duration) as max_duration
-                FROM benchmark_results
-                WHERE success = 1
-                GROUP BY model
-            """)
+            if not models:
+                models = self.get_models()
+            prompts = self.get_prompts()
+            if not models or not prompts:
+                print("No models or prompts available for benchmarking")
+                return {"error": "No models or prompts available"}
+                
+            strata = {}
+            for prompt in prompts:
+                strata.setdefault(prompt['category'] or 'uncategorized', []).append(prompt)
+            sizes = {category: len(members) for category, members in strata.items()}
             
-            model_stats = self.cursor.fetchall()
+            self.start_run({"mode": "quick", "ci_width": ci_width, "request_timeout": self.request_timeout, "max_tokens": self.max_tokens})
+            estimates = []
+            for model in models:
+                print(f"\nQuick benchmark of model: {model}")
+                self.cursor.execute("""
+                    SELECT prompt_id, eval_count, eval_duration, total_duration, load_duration
+                    FROM benchmark_results
+                    WHERE model = %s AND options IS NULL AND success = 1 AND eval_duration > 0
+                """, (model,))
+                existing = {row['prompt_id']: row for row in self.cursor.fetchall()}
+                
+                rng = random.Random(seed)
+                queues = {category: rng.sample(members, len(members)) for category, members in strata.items()}
+                samples = {category: {"tokens_per_second": [], "latency": []} for category in strata}
+                taken = run_count = failed_count = consecutive_failures = 0
+                converged = False
+                
+                while True:
+                    pending = [category for category in strata if queues[category]]
+                    if not pending or (max_samples and taken + failed_count >= max_samples):
+                        break
+                    if consecutive_failures >= QUICK_MAX_CONSECUTIVE_FAILURES:
+                        print(f"  {model}: {consecutive_failures} runs in a row failed, giving up on this model")
+                        break
+                    under = [c for c in pending if len(samples[c]['latency']) < min_per_category]
+                    if under:
+                        category = under[0]
+                    else:
+                        category = max(pending, key=lambda c: stratum_priority(samples, sizes, c))
+                        
+                    prompt = queues[category].pop()
+                    row = existing.get(prompt['id'])
+                    if row is None:
+                        result = self.run_prompt(model, prompt)
+                        self.save_result(result)
+                        run_count += 1
+                        if not result['success'] or not result.get('eval_duration'):
+                            failed_count += 1
+                            consecutive_failures += 1
+                            continue
+                        consecutive_failures = 0
+                        row = result
+                    samples[category]['tokens_per_second'].append(row['eval_count'] / (row['eval_duration'] / 1e9))
+                    samples[category]['latency'].append(row['total_duration'] - (row['load_duration'] or 0) / 1e9)
+                    taken += 1
+                    
+                    # Early stopping only applies once every category has its minimum sample
+                    if any(len(samples[c]['latency']) < min(min_per_category, sizes[c]) and queues[c] for c in strata):
+                        continue
+                    tps = stratified_estimate({c: s['tokens_per_second'] for c, s in samples.items()}, sizes)
+                    latency = stratified_estimate({c: s['latency'] for c, s in samples.items()}, sizes)
+                    if tps[1] <= ci_width * tps[0] and latency[1] <= ci_width * latency[0]:
+                        converged = True
+                        break
+                        
+                tps = stratified_estimate({c: s['tokens_per_second'] for c, s in samples.items()}, sizes)
+                latency = stratified_estimate({c: s['latency'] for c, s in samples.items()}, sizes)
+                estimate = {
+                    "model": model,
+                    "samples": taken,
+                    "new_runs": run_count,
+                    "failed_runs": failed_count,
+                    "converged": converged,
+                    "tokens_per_second": tps[0],
+                    # null when the sample gives no error estimate, JSON has no Infinity
+                    "tokens_per_second_ci95": tps[1] if math.isfinite(tps[1]) else None,
+                    "latency": latency[0],
+                    "latency_ci95": latency[1] if math.isfinite(latency[1]) else None
+                }
+                estimates.append(estimate)
+                print(f"  {model}: {tps[0]:.1f} ± {tps[1]:.1f} tokens/s, latency {latency[0]:.2f} ± {latency[1]:.2f}s "
+                      f"({taken} samples, {run_count} new runs, {failed_count} failed{'' if converged else ', target width not reached'})")
+                      
+            self.finish_run()
+            return {
+                "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                "ci_width_percent": 100 * ci_width,
+                "categories": sizes,
+                "models": sorted(estimates, key=lambda e: -e['tokens_per_second'])
+            }
             
-            # Get category stats
-            self.cursor.execute("""
-                SELECT p.category, r.model,
-                       COUNT(*) as total_prompts,
-                       AVG(total_duration) as avg_duration
-                FROM benchmark_results r
-                JOIN prompts p ON r.prompt_id = p.id
-                WHERE r.success = 1
-                GROUP BY p.category, r.model
-            """)
+        except Exception as e:
+            print(f"Error running quick benchmark: {str(e)}")
+            return {"error": str(e)}
+        finally:
+            self.close_db()
             
-            category_stats = self.cursor.fetchall()
+    def enqueue_jobs(self, sweep: str, models: List[str] = None, prompt_limit: int = None, specific_prompt_id: int = None, option_grid: List[Dict[str, Any]] = None, order: str = None) -> None:
+        """
+        Populate the job queue of a sweep with the runs that have no result yet.
+        
+        Jobs are inserted in plan order (see plan_work), so workers drain them
+        in that order. Runs already queued in the same sweep are not added again.
+        
+        Args:
+            sweep: Name of the sweep the jobs belong to
+            models: List of models to benchmark, defaults to all available
+            prompt_limit: Optional limit on number of prompts to use
+            specific_prompt_id: Optional specific prompt ID to benchmark
+            option_grid: Optional list of Ollama option sets
+            order: Work order, see plan_work
+        """
+        try:
+            self.connect_db()
             
-            report = {
-                "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                "model_stats": model_stats,
-                "category_stats": category_stats
-            }
+            if not models:
+                models = self.get_models()
+            prompts = self.get_prompts(prompt_id=specific_prompt_id, limit=prompt_limit)
+            if not models or not prompts:
+                print("No models or prompts available, nothing to enqueue")
+                return
+                
+            subset = specific_prompt_id is not None or bool(prompt_limit)
+            plan = self.plan_work(models, prompts, option_grid or [None], subset=subset, order=order)
             
-            return report
+            self.cursor.execute("SELECT model, options, prompt_id FROM benchmark_jobs WHERE sweep = %s", (sweep,))
+            queued = {(row['model'], row['options'], row['prompt_id']) for row in self.cursor.fetchall()}
+            
+            jobs = []
+            for item in plan['items']:
+                key = (item['model'], options_key(item['options']), item['prompt']['id'])
+                if key not in queued:
+                    jobs.append((sweep,) + key)
+                    
+            for start in range(0, len(jobs), transfer.EXPORT_BATCH_SIZE):
+                self.cursor.executemany("""
+                    INSERT INTO benchmark_jobs (sweep, model, options, prompt_id, status)
+                    VALUES (%s, %s, %s, %s, 'pending')
+                """, jobs[start:start + transfer.EXPORT_BATCH_SIZE])
+                self.conn.commit()
+                
+            print(f"Enqueued {len(jobs)} jobs in sweep '{sweep}' ({len(plan['items']) - len(jobs)} already queued)")
             
         except Exception as e:
-            print(f"Error generating report: {str(e)}")
-            return {"error": str(e)}
+            print(f"Error enqueuing jobs: {str(e)}")
         finally:
             self.close_db()
-
-# Example usage
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description='LLM Benchmark Framework')
-    parser.add_argument('--host', default='localhost', help='MySQL host')
-    parser.add_argument('--port', type=int, default=3306, help='MySQL port')
-    parser.add_argument('--user', required=True, help='MySQL username')
-    parser.add_argument('--password', required=True, help='MySQL password')
-    parser.add_argument('--database', required=True, help='MySQL database name')
-    parser.add_argument('--ollama', default='http://localhost:11434', help='Ollama API base URL')
+            
+    def lease_job(self, sweep: str, worker_id: str, lease_seconds: int, preferred_model: str = None) -> Optional[Dict[str, Any]]:
+        """
+        Lease the next pending job of a sweep.
+        
+        Rows locked by other workers are skipped (SELECT ... FOR UPDATE SKIP LOCKED),
+        so concurrent workers never lease the same job. Jobs whose lease expired
+        (worker crashed) are leased again. Jobs for the model the worker used last
+        are preferred, to avoid reloading models: they are looked up first with a
+        separate query on the (sweep, model, status) index, so neither query has
+        to sort (and lock) the whole sweep.
+        
+        Args:
+            sweep: Name of the sweep
+            worker_id: Identifier of the leasing worker
+            lease_seconds: Lease duration, extended by heartbeats while running
+            preferred_model: Model to prefer, usually the one already loaded
+            
+        Returns:
+            Job dictionary, or None if no job is available
+        """
+        job = None
+        if preferred_model is not None:
+            self.cursor.execute("""
+                SELECT id, model, options, prompt_id
+                FROM benchmark_jobs
+                WHERE sweep = %s AND model = %s
+                AND (status = 'pending' OR (status = 'leased' AND lease_expires < NOW()))
+                AND attempts < %s
+                ORDER BY id
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            """, (sweep, preferred_model, JOB_MAX_ATTEMPTS))
+            job = self.cursor.fetchone()
+        if job is None:
+            self.cursor.execute("""
+                SELECT id, model, options, prompt_id
+                FROM benchmark_jobs
+                WHERE sweep = %s
+                AND (status = 'pending' OR (status = 'leased' AND lease_expires < NOW()))
+                AND attempts < %s
+                ORDER BY id
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            """, (sweep, JOB_MAX_ATTEMPTS))
+            job = self.cursor.fetchone()
+        if job is None:
+            self.conn.commit()
+            return None
+            
+        self.cursor.execute("""
+            UPDATE benchmark_jobs
+            SET status = 'leased', worker = %s, attempts = attempts + 1,
+                lease_expires = NOW() + INTERVAL %s SECOND
+            WHERE id = %s
+        """, (worker_id, lease_seconds, job['id']))
+        self.conn.commit()
+        return job
+        
+    def count_open_jobs(self, sweep: str) -> int:
+        """
+        Count the jobs of a sweep that may still become available to lease.
+        
+        These are pending jobs locked by other workers at the moment and jobs
+        leased by other workers, which are leased again if their worker crashes.
+        
+        Args:
+            sweep: Name of the sweep
+            
+        Returns:
+            Number of pending or leased jobs with attempts left
+        """
+        self.cursor.execute("""
+            SELECT COUNT(*) as jobs
+            FROM benchmark_jobs
+            WHERE sweep = %s AND status IN ('pending', 'leased') AND attempts < %s
+        """, (sweep, JOB_MAX_ATTEMPTS))
+        jobs = self.cursor.fetchone()['jobs']
+        self.conn.commit()
+        return jobs
+        
+    def _heartbeat(self, worker_id: str, lease_seconds: int, stop: threading.Event) -> None:
+        """Extend the lease of the worker's current job until stop is set."""
+        conn = None
+        try:
+            while not stop.wait(lease_seconds / 3):
+                job_id = self.current_job_id
+                if job_id is None:
+                    continue
+                try:
+                    if conn is None:
+                        # Lease extensions must be visible right away, so never batch commits here
+                        conn = storage.connect(dict(self.db_config, commit_batch=1))
+                    cursor = conn.cursor()
+                    cursor.execute("""
+                        UPDATE benchmark_jobs
+                        SET lease_expires = NOW() + INTERVAL %s SECOND
+                        WHERE id = %s AND worker = %s AND status = 'leased'
+                    """, (lease_seconds, job_id, worker_id))
+                    conn.commit()
+                    cursor.close()
+                except storage.Error as e:
+                    # Retried on the next beat with a new connection
+                    print(f"Error extending lease of job {job_id}: {str(e)}")
+                    if conn is not None:
+                        try:
+                            conn.close()
+                        except storage.Error:
+                            pass
+                        conn = None
+        finally:
+            if conn is not None:
+                conn.close()
+            
+    def run_worker(self, sweep: str, lease_seconds: int = 300) -> None:
+        """
+        Drain the job queue of a sweep, possibly together with other workers.
+        
+        Each leased job is run and its result saved in the same transaction that
+        marks the job done. A background heartbeat keeps the lease alive while a
+        generation is running, so only crashed workers lose their jobs.
+        
+        Args:
+            sweep: Name of the sweep to work on
+            lease_seconds: Lease duration in seconds
+        """
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(worker_id, lease_seconds, stop), daemon=True)
+        self.current_job_id = None
+        try:
+            self.connect_db()
+            heartbeat.start()
+            self.start_run({"mode": "worker", "sweep": sweep, "request_timeout": self.request_timeout, "max_tokens": self.max_tokens})
+            print(f"Worker {worker_id} draining sweep '{sweep}'")
+            
+            completed = 0
+            current_model = None
+            prompts = {}
+            while True:
+                job = self.lease_job(sweep, worker_id, lease_seconds, current_model)
+                if job is None:
+                    # Jobs locked or leased by other workers may still come back
+                    if self.count_open_jobs(sweep) == 0:
+                        break
+                    time.sleep(JOB_POLL_INTERVAL)
+                    continue
+                self.current_job_id = job['id']
+                current_model = job['model']
+                
+                if job['prompt_id'] not in prompts:
+                    prompts.update({prompt['id']: prompt for prompt in self.get_prompts(prompt_id=job['prompt_id'])})
+                options = json.loads(job['options']) if job['options'] else None
+                
+                result = self.run_prompt(job['model'], prompts[job['prompt_id']], options)
+                result_id = self.save_result(result, commit=False)
+                self.cursor.execute("""
+                    UPDATE benchmark_jobs
+                    SET status = %s, result_id = %s, lease_expires = NULL
+                    WHERE id = %s AND worker = %s AND status = 'leased'
+                """, ('done' if result['success'] else 'failed', result_id, job['id'], worker_id))
+                if self.cursor.rowcount != 1:
+                    # The lease expired and another worker took the job over
+                    self.conn.rollback()
+                    self.current_job_id = None
+                    print(f"  - Lost the lease of job {job['id']}, result discarded")
+                    continue
+                self.conn.commit()
+                self.current_job_id = None
+                if self.evaluation_pipeline and result['success']:
+                    self.evaluation_pipeline.submit(result_id, prompts[job['prompt_id']]['prompt_text'], result['response_text'])
+                completed += 1
+                print(f"  - Job {job['id']} completed, result ID: {result_id}")
+                
+            self.finish_run()
+            print(f"\nNo more jobs available in sweep '{sweep}', worker completed {completed} jobs")
+            
+        except Exception as e:
+            print(f"Error running worker: {str(e)}")
+        finally:
+            stop.set()
+            self.close_db()
+            
+    def get_queue_status(self, sweep: str) -> Dict[str, Any]:
+        """
+        Summarize the job queue of a sweep.
+        
+        Args:
+            sweep: Name of the sweep
+            
+        Returns:
+            Dictionary with job counts per status and per active worker
+        """
+        try:
+            self.connect_db()
+            
+            self.cursor.execute("""
+                SELECT CASE WHEN status = 'leased' AND lease_expires < NOW() THEN 'expired' ELSE status END as status,
+                       COUNT(*) as jobs
+                FROM benchmark_jobs
+                WHERE sweep = %s
+                GROUP BY 1
+            """, (sweep,))
+            by_status = {row['status']: row['jobs'] for row in self.cursor.fetchall()}
+            
+            self.cursor.execute("""
+                SELECT worker, COUNT(*) as jobs, MAX(updated_at) as last_update
+                FROM benchmark_jobs
+                WHERE sweep = %s AND worker IS NOT NULL
+                GROUP BY worker
+                ORDER BY last_update DESC
+            """, (sweep,))
+            workers = self.cursor.fetchall()
+            
+            return {
+                "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                "sweep": sweep,
+                "jobs": by_status,
+                "workers": workers
+            }
+            
+        except Exception as e:
+            print(f"Error reading queue status: {str(e)}")
+            return {"error": str(e)}
+        finally:
+            self.close_db()
+            
+    def run_embedding_batch(self, model: str, texts: List[str]) -> Dict[str, Any]:
+        """
+        Embed one batch of texts through /api/embed and measure it.
+        
+        Args:
+            model: Name of the embedding model
+            texts: Input texts of the batch
+            
+        Returns:
+            Dictionary with batch metrics
+        """
+        import requests
+        
+        result = {
+            "model": model,
+            "batch_size": len(texts),
+            "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+        
+        start_time = time.time()
+        try:
+            response = requests.post(
+                f"{self.ollama_base_url}/api/embed",
+                json={"model": model, "input": texts, "truncate": True},
+                timeout=(10, self.request_timeout)
+            )
+        except requests.exceptions.RequestException as e:
+            result.update(success=False, error=f"Network Error: {e}")
+            return result
+        end_time = time.time()
+        
+        if response.status_code != 200:
+            result.update(success=False, error=f"API Error: {response.status_code}")
+            return result
+            
+        response_data = response.json()
+        embeddings = response_data.get('embeddings', [])
+        result.update({
+            "success": True,
+            "input_count": len(embeddings),
+            "embedding_length": len(embeddings[0]) if embeddings else None,
+            "total_duration": end_time - start_time,
+            "load_duration": response_data.get('load_duration', 0),
+            "prompt_eval_count": response_data.get('prompt_eval_count', 0)
+        })
+        return result
+        
+    def save_embedding_result(self, result: Dict[str, Any]) -> int:
+        """
+        Save an embedding batch result to database.
+        
+        Args:
+            result: Dictionary with batch metrics
+            
+        Returns:
+            ID of inserted record
+        """
+        query = """
+            INSERT INTO embedding_results
+            (run_id, model, batch_size, input_count, success, error, total_duration,
+            load_duration, prompt_eval_count, embedding_length, timestamp)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """
+        values = (
+            self.run_id,
+            result['model'],
+            result['batch_size'],
+            result.get('input_count'),
+            result['success'],
+            result.get('error'),
+            result.get('total_duration'),
+            result.get('load_duration'),
+            result.get('prompt_eval_count'),
+            result.get('embedding_length'),
+            result['timestamp']
+        )
+        self.cursor.execute(query, values)
+        self.conn.commit()
+        return self.cursor.lastrowid
+        
+    def run_embedding_benchmark(self, models: List[str] = None, batch_sizes: List[int] = None, batches: int = 5, prompt_limit: int = None) -> None:
+        """
+        Measure embedding throughput for batches of varying size.
+        
+        Batches are filled with texts from the prompts table, cycling through
+        them when a batch is larger than the prompt set. Each model gets one
+        unrecorded warm-up call first, so model loading does not skew the
+        first measured batch.
+        
+        Args:
+            models: Embedding models to benchmark, defaults to all available
+            batch_sizes: Batch sizes to measure
+            batches: Number of measured batches per batch size
+            prompt_limit: Optional limit on number of prompts used as inputs
+        """
+        try:
+            self.connect_db()
+            
+            if not models:
+                models = self.get_models(embedding=True)
+            if not models:
+                print("No embedding models available for benchmarking")
+                return
+                
+            texts = [prompt['prompt_text'] for prompt in self.get_prompts(limit=prompt_limit)]
+            if not texts:
+                print("No prompts found in database")
+                return
+                
+            batch_sizes = batch_sizes or DEFAULT_EMBEDDING_BATCH_SIZES
+            self.start_run({"mode": "embed", "batch_sizes": batch_sizes, "batches": batches})
+            print(f"Starting embedding benchmark with {len(models)} models and batch sizes {batch_sizes}")
+            
+            for model in models:
+                print(f"\nBenchmarking embedding model: {model}")
+                self.run_embedding_batch(model, texts[:1])
+                
+                offset = 0
+                for batch_size in batch_sizes:
+                    for _ in range(batches):
+                        batch = [texts[(offset + i) % len(texts)] for i in range(batch_size)]
+                        offset = (offset + batch_size) % len(texts)
+                        
+                        result = self.run_embedding_batch(model, batch)
+                        result_id = self.save_embedding_result(result)
+                        if result['success']:
+                            print(f"  - Batch of {batch_size}: {result['total_duration']:.3f}s, "
+                                  f"{result['input_count'] / result['total_duration']:.1f} inputs/s, result ID: {result_id}")
+                        else:
+                            print(f"  - Batch of {batch_size} failed: {result['error']}")
+                            
+            self.finish_run()
+            print("\nEmbedding benchmark completed successfully")
+            
+        except Exception as e:
+            print(f"Error running embedding benchmark: {str(e)}")
+        finally:
+            self.close_db()
+            
+    def generate_embedding_report(self) -> Dict[str, Any]:
+        """
+        Report embedding throughput and latency per model and batch size.
+        
+        Returns:
+            Dictionary with per-batch-size statistics and the fastest batch size per model
+        """
+        try:
+            self.connect_db()
+            
+            self.cursor.execute("""
+                SELECT model, batch_size,
+                       COUNT(*) as batches,
+                       SUM(input_count) / SUM(total_duration) as inputs_per_second,
+                       SUM(prompt_eval_count) / SUM(total_duration) as tokens_per_second,
+                       AVG(total_duration) as avg_latency,
+                       MIN(total_duration) as min_latency,
+                       MAX(total_duration) as max_latency
+                FROM embedding_results
+                WHERE success = 1 AND total_duration > 0
+                GROUP BY model, batch_size
+                ORDER BY model, batch_size
+            """)
+            batch_stats = self.cursor.fetchall()
+            
+            best_batch_sizes = {}
+            for row in batch_stats:
+                best = best_batch_sizes.get(row['model'])
+                if best is None or row['inputs_per_second'] > best['inputs_per_second']:
+                    best_batch_sizes[row['model']] = row
+                    
+            return {
+                "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                "best_batch_sizes": list(best_batch_sizes.values()),
+                "batch_stats": batch_stats
+            }
+            
+        except Exception as e:
+            print(f"Error generating embedding report: {str(e)}")
+            return {"error": str(e)}
+        finally:
+            self.close_db()
+            
+    def get_conversations(self, turns: int, limit: int = None) -> Dict[str, List[str]]:
+        """
+        Build multi-turn conversation scripts from the prompts table.
+        
+        Each prompt category becomes one conversation whose turns are the first
+        `turns` prompts of that category, in ID order.
+        
+        Args:
+            turns: Maximum number of turns per conversation
+            limit: Optional maximum number of conversations
+            
+        Returns:
+            Dictionary mapping conversation names to lists of user messages
+        """
+        self.cursor.execute("""
+            SELECT id, prompt_text, category
+            FROM prompts
+            WHERE category IS NOT NULL
+            ORDER BY category, id
+        """)
+        conversations = {}
+        for row in self.cursor.fetchall():
+            messages = conversations.setdefault(row['category'], [])
+            if len(messages) < turns:
+                messages.append(row['prompt_text'])
+                
+        # A single turn cannot benefit from the cache
+        conversations = {name: messages for name, messages in conversations.items() if len(messages) > 1}
+        if limit:
+            conversations = dict(list(conversations.items())[:limit])
+        print(f"Built {len(conversations)} conversations with up to {turns} turns")
+        return conversations
+        
+    def run_chat_turn(self, model: str, messages: List[Dict[str, str]], options: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Send one /api/chat request and collect its prefill and decode metrics.
+        
+        Args:
+            model: Name of the LLM model to use
+            messages: Full message history including the new user message
+            options: Optional Ollama runtime options
+            
+        Returns:
+            Dictionary with the assistant reply and metrics
+        """
+        import requests
+        
+        request_data = {"model": model, "messages": messages, "stream": False}
+        if options:
+            request_data["options"] = options
+            
+        start_time = time.time()
+        try:
+            response = requests.post(
+                f"{self.ollama_base_url}/api/chat",
+                json=request_data,
+                timeout=(10, self.request_timeout)
+            )
+        except requests.exceptions.RequestException as e:
+            return {"success": False, "error": f"Network Error: {e}"}
+        end_time = time.time()
+        
+        if response.status_code != 200:
+            return {"success": False, "error": f"API Error: {response.status_code}"}
+            
+        response_data = response.json()
+        return {
+            "success": True,
+            "reply": response_data.get('message', {}).get('content', ''),
+            "total_duration": end_time - start_time,
+            "eval_count": response_data.get('eval_count', 0),
+            "eval_duration": response_data.get('eval_duration', 0),
+            "prompt_eval_count": response_data.get('prompt_eval_count', 0),
+            "prompt_eval_duration": response_data.get('prompt_eval_duration', 0)
+        }
+        
+    def save_conversation_result(self, model: str, conversation: str, turn: int, mode: str, result: Dict[str, Any]) -> int:
+        """
+        Save the metrics of one conversation turn to database.
+        
+        Returns:
+            ID of inserted record
+        """
+        query = """
+            INSERT INTO conversation_results
+            (run_id, model, conversation, turn, mode, success, error, total_duration,
+            eval_count, eval_duration, prompt_eval_count, prompt_eval_duration, timestamp)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """
+        values = (
+            self.run_id,
+            model,
+            conversation,
+            turn,
+            mode,
+            result['success'],
+            result.get('error'),
+            result.get('total_duration'),
+            result.get('eval_count'),
+            result.get('eval_duration'),
+            result.get('prompt_eval_count'),
+            result.get('prompt_eval_duration'),
+            datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        )
+        self.cursor.execute(query, values)
+        self.conn.commit()
+        return self.cursor.lastrowid
+        
+    def run_conversation_benchmark(self, models: List[str] = None, turns: int = 5, conversation_limit: int = None) -> None:
+        """
+        Measure how much prefill time prompt (KV) cache reuse saves in conversations.
+        
+        Each conversation is first played turn by turn through /api/chat with the
+        growing history ('warm' mode), so Ollama can reuse the cached prefix. The
+        same histories are then replayed one request per turn behind a fresh
+        random system message ('cold' mode), which invalidates the cached prefix
+        and forces a full prefill. Cold requests generate a single token only.
+        Warm conversations also start with their own random system message, so
+        earlier runs cannot pre-warm the first turn.
+        
+        Args:
+            models: List of models to benchmark, defaults to all available
+            turns: Maximum number of turns per conversation
+            conversation_limit: Optional maximum number of conversations
+        """
+        try:
+            self.connect_db()
+            
+            if not models:
+                models = self.get_models()
+            conversations = self.get_conversations(turns, conversation_limit)
+            if not models or not conversations:
+                print("No models or conversations available for benchmarking")
+                return
+                
+            self.start_run({"mode": "chat", "turns": turns, "request_timeout": self.request_timeout, "max_tokens": self.max_tokens})
+            warm_options = {"num_predict": self.max_tokens} if self.max_tokens else None
+            for model in models:
+                print(f"\nBenchmarking conversations on model: {model}")
+                for name, user_messages in conversations.items():
+                    history = [{"role": "system", "content": f"Session {uuid.uuid4().hex}"}]
+                    histories = []
+                    for turn, user_message in enumerate(user_messages, 1):
+                        history.append({"role": "user", "content": user_message})
+                        result = self.run_chat_turn(model, history, warm_options)
+                        self.save_conversation_result(model, name, turn, 'warm', result)
+                        if not result['success']:
+                            print(f"  - {name} turn {turn} failed: {result['error']}")
+                            break
+                        histories.append(list(history[1:]))
+                        history.append({"role": "assistant", "content": result['reply']})
+                        
+                    for turn, turn_history in enumerate(histories, 1):
+                        messages = [{"role": "system", "content": f"Session {uuid.uuid4().hex}"}] + turn_history
+                        result = self.run_chat_turn(model, messages, {"num_predict": 1})
+                        self.save_conversation_result(model, name, turn, 'cold', result)
+                        
+                    print(f"  - {name}: {len(histories)} turns completed")
+                    
+            self.finish_run()
+            print("\nConversation benchmark completed successfully")
+            
+        except Exception as e:
+            print(f"Error running conversation benchmark: {str(e)}")
+        finally:
+            self.close_db()
+            
+    def generate_conversation_report(self) -> Dict[str, Any]:
+        """
+        Report prefill work and time saved by prompt-cache reuse per model.
+        
+        Returns:
+            Dictionary with per-model and per-turn warm/cold prefill statistics
+        """
+        try:
+            self.connect_db()
+            
+            self.cursor.execute("""
+                SELECT model, turn,
+                       AVG(CASE WHEN mode = 'warm' THEN prompt_eval_count END) as warm_prompt_tokens,
+                       AVG(CASE WHEN mode = 'cold' THEN prompt_eval_count END) as cold_prompt_tokens,
+                       AVG(CASE WHEN mode = 'warm' THEN prompt_eval_duration END) / 1e9 as warm_prefill_seconds,
+                       AVG(CASE WHEN mode = 'cold' THEN prompt_eval_duration END) / 1e9 as cold_prefill_seconds
+                FROM conversation_results
+                WHERE success = 1
+                GROUP BY model, turn
+                ORDER BY model, turn
+            """)
+            turn_stats = self.cursor.fetchall()
+            
+            model_stats = {}
+            for row in turn_stats:
+                if row['warm_prefill_seconds'] is None or row['cold_prefill_seconds'] is None:
+                    continue
+                stats = model_stats.setdefault(row['model'], {"model": row['model'], "warm_prefill_seconds": 0.0, "cold_prefill_seconds": 0.0})
+                stats['warm_prefill_seconds'] += float(row['warm_prefill_seconds'])
+                stats['cold_prefill_seconds'] += float(row['cold_prefill_seconds'])
+            for stats in model_stats.values():
+                stats['saved_seconds'] = stats['cold_prefill_seconds'] - stats['warm_prefill_seconds']
+                stats['saved_percent'] = (100 * stats['saved_seconds'] / stats['cold_prefill_seconds']
+                                          if stats['cold_prefill_seconds'] else None)
+                
+            return {
+                "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                "model_stats": list(model_stats.values()),
+                "turn_stats": turn_stats
+            }
+            
+        except Exception as e:
+            print(f"Error generating conversation report: {str(e)}")
+            return {"error": str(e)}
+        finally:
+            self.close_db()
+            
+    def generate_report(self) -> Dict[str, Any]:
+        """
+        Generate a simple benchmark report.
+        
+        Returns:
+            Dictionary with benchmark statistics
+        """
+        try:
+            self.connect_db()
+            
+            # Get models stats, option-grid runs apart from the default options (NULL)
+            self.cursor.execute("""
+                SELECT model, options,
+                       COUNT(*) as total_prompts,
+                       AVG(total_duration) as avg_duration,
+                       AVG(eval_count) as avg_eval_count,
+                       MIN(total_duration) as min_duration,
+                       MAX(total_duration) as max_duration
+                FROM benchmark_results
+                WHERE success = 1
+                GROUP BY model, options
+            """)
+            
+            model_stats = self.cursor.fetchall()
+            
+            # Get category stats
+            self.cursor.execute("""
+                SELECT p.category, r.model, r.options,
+                       COUNT(*) as total_prompts,
+                       AVG(total_duration) as avg_duration
+                FROM benchmark_results r
+                JOIN prompts p ON r.prompt_id = p.id
+                WHERE r.success = 1
+                GROUP BY p.category, r.model, r.options
+            """)
+            
+            category_stats = self.cursor.fetchall()
+            
+            report = {
+                "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                "model_stats": model_stats,
+                "category_stats": category_stats
+            }
+            
+            return report
+            
+        except Exception as e:
+            print(f"Error generating report: {str(e)}")
+            return {"error": str(e)}
+        finally:
+            self.close_db()
+            
+    def generate_grid_report(self) -> Dict[str, Any]:
+        """
+        Report the fastest option set per model from parameter-grid runs.
+        
+        Speed is measured as decode throughput (eval_count / eval_duration),
+        results with default options are included as the baseline.
+        
+        Returns:
+            Dictionary with per-option-set statistics and the best set per model
+        """
+        try:
+            self.connect_db()
+            
+            self.cursor.execute("""
+                SELECT model, options,
+                       COUNT(*) as total_prompts,
+                       SUM(eval_count) / (SUM(eval_duration) / 1e9) as tokens_per_second,
+                       AVG(total_duration) as avg_duration
+                FROM benchmark_results
+                WHERE success = 1 AND eval_duration > 0
+                GROUP BY model, options
+                ORDER BY model, tokens_per_second DESC
+            """)
+            
+            grid_stats = self.cursor.fetchall()
+            
+            best_options = {}
+            for row in grid_stats:
+                row['options'] = json.loads(row['options']) if row['options'] else None
+                row['tokens_per_second'] = float(row['tokens_per_second'])
+                best = best_options.get(row['model'])
+                if best is None or row['tokens_per_second'] > best['tokens_per_second']:
+                    best_options[row['model']] = row
+            
+            report = {
+                "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                "best_options": list(best_options.values()),
+                "grid_stats": grid_stats
+            }
+            
+            return report
+            
+        except Exception as e:
+            print(f"Error generating grid report: {str(e)}")
+            return {"error": str(e)}
+        finally:
+            self.close_db()
+
+    def export_data(self, directory: str, tables: List[str] = None, file_format: str = 'parquet', columns: List[str] = None, exclude_response: bool = False, batch_size: int = transfer.EXPORT_BATCH_SIZE) -> None:
+        """
+        Export benchmark tables to Parquet or gzipped JSONL files.
+        
+        Args:
+            directory: Output directory, one file per table is written
+            tables: Tables to export, defaults to all of transfer.EXPORT_TABLES
+            file_format: 'parquet' or 'jsonl' (gzip compressed)
+            columns: Optional column selection, see transfer.export_data
+            exclude_response: Whether to leave out benchmark_responses
+            batch_size: Number of rows fetched and written at a time
+        """
+        try:
+            self.connect_db()
+            transfer.export_data(self.conn, directory, storage.database_name(self.db_config), tables, file_format, columns, exclude_response, batch_size)
+        except Exception as e:
+            print(f"Error exporting data: {str(e)}")
+        finally:
+            self.close_db()
+            
+    def import_data(self, directory: str, tables: List[str] = None, batch_size: int = transfer.EXPORT_BATCH_SIZE) -> None:
+        """
+        Load files written by export_data, see transfer.import_data.
+        
+        Args:
+            directory: Directory containing <table>.parquet or <table>.jsonl.gz files
+            tables: Tables to import, defaults to all files found
+            batch_size: Number of rows read per batch
+        """
+        try:
+            self.connect_db()
+            transfer.import_data(self.conn, directory, tables, self.response_codec, batch_size)
+        except Exception as e:
+            print(f"Error importing data: {str(e)}")
+        finally:
+            self.close_db()
+
+    def import_prompts(self, path: str, batch_size: int = transfer.EXPORT_BATCH_SIZE) -> None:
+        """
+        Stream prompts from a JSONL file into the prompts table, see transfer.import_prompts.
+        
+        Args:
+            path: Path of a .jsonl, .jsonl.gz or .parquet file
+            batch_size: Number of prompts inserted per statement
+        """
+        try:
+            self.connect_db()
+            transfer.import_prompts(self.conn, path, batch_size)
+        except Exception as e:
+            print(f"Error importing prompts: {str(e)}")
+        finally:
+            self.close_db()
+            
+    def sync_data(self, target_config: Dict[str, Any], batch_size: int = transfer.EXPORT_BATCH_SIZE) -> None:
+        """
+        Copy new results from the SQLite database into a MySQL database, see transfer.sync_data.
+        
+        Args:
+            target_config: mysql.connector configuration of the target database
+            batch_size: Number of rows copied per transaction
+        """
+        target = None
+        try:
+            self.connect_db()
+            target = storage.connect(target_config)
+            target_name = f"{target_config['host']}:{target_config['port']}/{target_config['database']}"
+            transfer.sync_data(self.conn, target, target_name, batch_size)
+        except Exception as e:
+            print(f"Error syncing data: {str(e)}")
+        finally:
+            if target:
+                target.close()
+            self.close_db()
+
+    def generate_pareto_report(self, min_score: float = None) -> Dict[str, Any]:
+        """
+        Report the quality/speed Pareto-optimal models per prompt category.
+        
+        Each model is described per category by its mean judge overall_score,
+        decode tokens/sec and mean end-to-end latency. A model is Pareto-optimal
+        if no other model is at least as good on all three and better on one.
+        Only results with default options are used.
+        
+        Args:
+            min_score: Optional quality bar, the fastest (lowest latency) model
+                reaching it is recommended for each category
+            
+        Returns:
+            Dictionary with the Pareto set and recommendation per category
+        """
+        try:
+            self.connect_db()
+            
+            self.cursor.execute("""
+                SELECT t.category, t.model, mm.parameters, mm.quantization,
+                       t.results, q.evaluations, q.mean_score,
+                       t.tokens_per_second, t.avg_latency
+                FROM (
+                    SELECT p.category, r.model,
+                           COUNT(*) as results,
+                           SUM(r.eval_count) / (SUM(r.eval_duration) / 1e9) as tokens_per_second,
+                           AVG(r.total_duration) as avg_latency
+                    FROM benchmark_results r
+                    JOIN prompts p ON r.prompt_id = p.id
+                    WHERE r.success = 1 AND r.eval_duration > 0 AND r.options IS NULL
+                    GROUP BY p.category, r.model
+                ) t
+                JOIN (
+                    SELECT p.category, r.model,
+                           COUNT(*) as evaluations,
+                           AVG(er.overall_score) as mean_score
+                    FROM evaluation_results er
+                    JOIN benchmark_results r ON er.benchmark_result_id = r.id
+                    JOIN prompts p ON r.prompt_id = p.id
+                    WHERE r.options IS NULL
+                    GROUP BY p.category, r.model
+                ) q ON q.category <=> t.category AND q.model = t.model
+                LEFT JOIN model_metadata mm ON mm.model_name = t.model
+                ORDER BY t.category, q.mean_score DESC
+            """)
+            
+            by_category = {}
+            for row in self.cursor.fetchall():
+                for column in ('mean_score', 'tokens_per_second', 'avg_latency'):
+                    row[column] = float(row[column])
+                by_category.setdefault(row['category'], []).append(row)
+                
+            categories = []
+            for category, candidates in by_category.items():
+                front = pareto_front(candidates, maximize=['mean_score', 'tokens_per_second'], minimize=['avg_latency'])
+                recommended = None
+                if min_score is not None:
+                    qualifying = [row for row in front if row['mean_score'] >= min_score]
+                    if qualifying:
+                        recommended = min(qualifying, key=lambda row: row['avg_latency'])['model']
+                categories.append({
+                    "category": category,
+                    "models_compared": len(candidates),
+                    "pareto_front": front,
+                    "recommended": recommended
+                })
+                
+            return {
+                "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                "min_score": min_score,
+                "categories": categories
+            }
+            
+        except Exception as e:
+            print(f"Error generating Pareto report: {str(e)}")
+            return {"error": str(e)}
+        finally:
+            self.close_db()
+
+    def compare_runs(self, baseline_run: int, candidate_run: int, alpha: float = 0.05, threshold: float = 0.05) -> Dict[str, Any]:
+        """
+        Test two benchmark runs for performance regressions per model.
+        
+        Per-result decode tokens/sec and end-to-end latency are compared with a
+        two-sided Wilcoxon signed-rank test, paired by prompt, using only prompts
+        measured in both runs. Option sets of a model are compared separately. A metric regresses if the difference is
+        significant (p < alpha) and the candidate median is worse than the
+        baseline median by more than threshold. Models with fewer than
+        COMPARE_MIN_SAMPLES common prompts make the comparison incomplete.
+        
+        Args:
+            baseline_run: ID of the reference run
+            candidate_run: ID of the run to check
+            alpha: Significance level
+            threshold: Minimum relative change of the median to report
+            
+        Returns:
+            Dictionary with both run fingerprints, per-model comparisons, the
+            list of regressions and whether every model could be compared
+        """
+        try:
+            self.connect_db()
+            
+            self.cursor.execute("SELECT * FROM benchmark_runs WHERE id IN (%s, %s)", (baseline_run, candidate_run))
+            runs = {row['id']: row for row in self.cursor.fetchall()}
+            for run_id in (baseline_run, candidate_run):
+                if run_id not in runs:
+                    raise ValueError(f"Benchmark run {run_id} not found")
+                    
+            self.cursor.execute("""
+                SELECT run_id, model, options, prompt_id,
+                       eval_count / (eval_duration / 1e9) as tokens_per_second,
+                       total_duration as latency
+                FROM benchmark_results
+                WHERE run_id IN (%s, %s) AND success = 1 AND eval_duration > 0
+            """, (baseline_run, candidate_run))
+            samples = {}
+            for row in self.cursor.fetchall():
+                samples.setdefault((row['model'], row['options'], row['run_id']), {})[row['prompt_id']] = row
+                
+            # Option sets of one model are compared separately, None (defaults) first
+            groups = sorted({(model, options) for model, options, _ in samples}, key=lambda g: (g[0], g[1] or ''))
+            comparisons = []
+            regressions = []
+            for model, options in groups:
+                baseline = samples.get((model, options, baseline_run), {})
+                candidate = samples.get((model, options, candidate_run), {})
+                common = sorted(set(baseline) & set(candidate))
+                comparison = {"model": model, "options": options, "prompts": len(common), "metrics": {}}
+                if len(common) < COMPARE_MIN_SAMPLES:
+                    comparison['status'] = 'insufficient data'
+                    comparisons.append(comparison)
+                    continue
+                    
+                for metric, higher_is_better in (('tokens_per_second', True), ('latency', False)):
+                    x = [float(baseline[prompt_id][metric]) for prompt_id in common]
+                    y = [float(candidate[prompt_id][metric]) for prompt_id in common]
+                    _, p_value = wilcoxon_signed_rank(x, y)
+                    change = (statistics.median(y) - statistics.median(x)) / statistics.median(x)
+                    worse = -change if higher_is_better else change
+                    regressed = p_value < alpha and worse > threshold
+                    comparison['metrics'][metric] = {
+                        "baseline_median": statistics.median(x),
+                        "candidate_median": statistics.median(y),
+                        "change_percent": 100 * change,
+                        "p_value": p_value,
+                        "regression": regressed
+                    }
+                    if regressed:
+                        regressions.append({"model": model, "options": options, "metric": metric, "change_percent": 100 * change, "p_value": p_value})
+                comparison['status'] = 'regression' if any(m['regression'] for m in comparison['metrics'].values()) else 'ok'
+                comparisons.append(comparison)
+                
+            return {
+                "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                "baseline_run": runs[baseline_run],
+                "candidate_run": runs[candidate_run],
+                "alpha": alpha,
+                "threshold_percent": 100 * threshold,
+                "models": comparisons,
+                "regressions": regressions,
+                "complete": bool(comparisons) and all(c['status'] != 'insufficient data' for c in comparisons)
+            }
+            
+        except Exception as e:
+            print(f"Error comparing runs: {str(e)}")
+            return {"error": str(e)}
+        finally:
+            self.close_db()
+
+def main(argv: List[str] = None, prog: str = None) -> int:
+    """Command line interface, also used by `llmbench.py run/report/status`."""
+    parser = argparse.ArgumentParser(prog=prog, description='LLM Benchmark Framework')
+    add_db_arguments(parser)
+    parser.add_argument('--ollama', default='http://localhost:11434', help='Ollama API base URL')
     parser.add_argument('--models', nargs='+', help='Models to benchmark')
     parser.add_argument('--limit', type=int, help='Limit number of prompts')
     parser.add_argument('--report', action='store_true', help='Generate report only')
     parser.add_argument('--prompt-id', type=int, help='Run benchmark for a specific prompt ID')
     parser.add_argument('--force', action='store_true', help='Force regeneration of results even if they exist')
+    parser.add_argument('--timeout', type=float, default=600, help='Wall-clock budget per request in seconds, 0 disables it')
+    parser.add_argument('--max-tokens', type=int, help='Token budget per request (Ollama num_predict)')
+    parser.add_argument('--trace-tokens', action='store_true', help='Store the arrival time of every streamed token with each result')
+    parser.add_argument('--plan', action='store_true', help='Print missing runs with estimated durations and ETA, then exit')
+    parser.add_argument('--order', choices=['pairs', 'models'], help='Run cheapest pairs first (most pairs soonest) or cheapest models first')
+    parser.add_argument('--embed', action='store_true', help='Benchmark embedding models through /api/embed')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', help='Embedding batch sizes (default: 1 8 32 128)')
+    parser.add_argument('--batches', type=int, default=5, help='Measured batches per embedding batch size')
+    parser.add_argument('--embed-report', action='store_true', help='Report embedding throughput per model and batch size')
+    parser.add_argument('--chat', action='store_true', help='Run multi-turn conversation benchmarks measuring prompt-cache reuse')
+    parser.add_argument('--turns', type=int, default=5, help='Maximum turns per conversation')
+    parser.add_argument('--chat-report', action='store_true', help='Report prefill time saved by prompt-cache reuse per model')
+    parser.add_argument('--pareto', action='store_true', help='Report quality/speed Pareto-optimal models per category')
+    parser.add_argument('--min-score', type=float, help='Quality bar for --pareto recommendations (overall_score)')
+    parser.add_argument('--compare', type=int, nargs=2, metavar=('BASELINE', 'CANDIDATE'), help='Test two benchmark runs for regressions, exit code 1 if any, 2 if some models could not be compared')
+    parser.add_argument('--alpha', type=float, default=0.05, help='Significance level for --compare')
+    parser.add_argument('--threshold', type=float, default=5.0, help='Minimum median slowdown in percent reported by --compare')
+    parser.add_argument('--quick', action='store_true', help='Screen models on a stratified prompt sample until the confidence intervals are narrow')
+    parser.add_argument('--ci-width', type=float, default=10.0, help='Target 95%% confidence half-width for --quick, in percent of the mean')
+    parser.add_argument('--min-per-category', type=int, default=2, help='Samples per category before --quick may stop')
+    parser.add_argument('--seed', type=int, help='Random seed for --quick sampling')
+    parser.add_argument('--evaluate', action='store_true', help='Evaluate results with Gemini while benchmarking (run and --worker modes)')
+    parser.add_argument('--eval-workers', type=int, default=2, help='Concurrent evaluator threads for --evaluate')
+    parser.add_argument('--eval-queue', type=int, default=8, help='Maximum results waiting for evaluation before generation pauses')
+    parser.add_argument('--sweep', default='default', help='Name of the job queue sweep')
+    parser.add_argument('--enqueue', action='store_true', help='Add missing runs to the job queue of --sweep and exit')
+    parser.add_argument('--worker', action='store_true', help='Run jobs from the queue of --sweep until it is drained')
+    parser.add_argument('--lease', type=int, default=300, help='Job lease duration in seconds')
+    parser.add_argument('--queue-status', action='store_true', help='Show job counts of --sweep and exit')
+    parser.add_argument('--grid', nargs='+', metavar='OPTION=V1,V2', help='Ollama options grid, e.g. num_thread=4,8 num_ctx=2048,4096')
+    parser.add_argument('--grid-sample', type=int, help='Run only a random subset of this many grid points')
+    parser.add_argument('--grid-seed', type=int, help='Random seed for --grid-sample')
+    parser.add_argument('--grid-report', action='store_true', help='Report the fastest option set per model')
+    parser.add_argument('--export', metavar='DIR', help='Export tables to DIR and exit')
+    parser.add_argument('--import', dest='import_dir', metavar='DIR', help='Import tables exported with --export from DIR and exit')
+    parser.add_argument('--import-prompts', metavar='FILE', help='Import prompts from a JSONL file and exit')
+    parser.add_argument('--tables', nargs='+', choices=transfer.EXPORT_TABLES, help='Tables to export/import (default: all)')
+    parser.add_argument('--format', choices=['parquet', 'jsonl'], default='parquet', help='Export file format')
+    parser.add_argument('--columns', nargs='+', help='Columns to export, as column or table.column')
+    parser.add_argument('--exclude-response', action='store_true', help='Do not export response bodies')
+    parser.add_argument('--response-codec', choices=RESPONSE_CODECS, default='zlib', help='Compression for stored responses (zstd needs the zstandard package)')
+    parser.add_argument('--migrate-responses', action='store_true', help='Move inline response_text into the compressed benchmark_responses table and exit')
+    parser.add_argument('--sync', action='store_true', help='Copy new results from the --sqlite database into the MySQL database given by --host/--user/--password and exit')
+    
+    args = parser.parse_args(argv)
+    check_db_arguments(parser, args)
+    if args.sync and not (args.sqlite and args.user and args.password):
+        parser.error("--sync needs --sqlite as the source and --user/--password of the target MySQL database")
+    
+    option_grid = None
+    if args.grid:
+        try:
+            option_grid = build_grid(parse_grid(args.grid), args.grid_sample, args.grid_seed)
+        except ValueError as e:
+            parser.error(str(e))
     
-    args = parser.parse_args()
+    db_config = db_config_from_args(args)
     
-    db_config = {
-        'host': args.host,
-        'port': args.port,
-        'user': args.user,
-        'password': args.password,
-        'database': args.database,
-        'charset': 'utf8mb4'
-    }
+    benchmark = LLMBenchmark(db_config, args.ollama, args.response_codec, args.timeout or None, args.max_tokens, args.trace_tokens)
     
-    benchmark = LLMBenchmark(db_config, args.ollama)
+    def start_evaluation_pipeline():
+        """Evaluate results while they are generated (--evaluate)."""
+        from gemini_evaluate import EvaluationPipeline, get_gemini_api_key
+        
+        gemini_api_key = get_gemini_api_key()
+        if not gemini_api_key:
+            parser.error("--evaluate needs GEMINI_API_KEY in the environment or a .env file")
+        benchmark.evaluation_pipeline = EvaluationPipeline(
+            db_config_from_args(args, use_unicode=True, autocommit=True),
+            gemini_api_key, args.eval_workers, args.eval_queue,
+            # Concurrent workers would all queue the same backlog
+            resume_backlog=not args.worker
+        )
+        benchmark.evaluation_pipeline.start()
     
     if args.report:
         report = benchmark.generate_report()
-        print(json.dumps(report, indent=2))
+        print(json.dumps(report, indent=2, default=str))
+    elif args.queue_status:
+        print(json.dumps(benchmark.get_queue_status(args.sweep), indent=2, default=str))
+    elif args.enqueue:
+        benchmark.enqueue_jobs(args.sweep, args.models, args.limit, args.prompt_id, option_grid, args.order)
+    elif args.worker:
+        if args.evaluate:
+            start_evaluation_pipeline()
+        benchmark.run_worker(args.sweep, args.lease)
+    elif args.migrate_responses:
+        benchmark.migrate_responses()
+    elif args.sync:
+        benchmark.sync_data(db_config_from_args(argparse.Namespace(**dict(vars(args), sqlite=None))))
+    elif args.export:
+        benchmark.export_data(args.export, args.tables, args.format, args.columns, args.exclude_response)
+    elif args.import_dir:
+        benchmark.import_data(args.import_dir, args.tables)
+    elif args.import_prompts:
+        benchmark.import_prompts(args.import_prompts)
+    elif args.grid_report:
+        report = benchmark.generate_grid_report()
+        print(json.dumps(report, indent=2, default=str))
+    elif args.embed_report:
+        report = benchmark.generate_embedding_report()
+        print(json.dumps(report, indent=2, default=str))
+    elif args.compare:
+        report = benchmark.compare_runs(args.compare[0], args.compare[1], args.alpha, args.threshold / 100)
+        print(json.dumps(report, indent=2, default=str))
+        if report.get('regressions') or 'error' in report:
+            return 1
+        if not report['complete']:
+            print(f"Warning: runs {args.compare[0]} and {args.compare[1]} share fewer than {COMPARE_MIN_SAMPLES} measured prompts "
+                  "for some models, nothing was tested for them. Measure the candidate run with --force.", file=sys.stderr)
+            return 2
+        return 0
+    elif args.pareto:
+        report = benchmark.generate_pareto_report(args.min_score)
+        print(json.dumps(report, indent=2, default=str))
+    elif args.chat_report:
+        report = benchmark.generate_conversation_report()
+        print(json.dumps(report, indent=2, default=str))
+    elif args.quick:
+        report = benchmark.run_quick_benchmark(args.models, args.ci_width / 100, args.min_per_category, args.limit, args.seed)
+        print(json.dumps(report, indent=2, default=str))
+    elif args.chat:
+        benchmark.run_conversation_benchmark(args.models, args.turns, args.limit)
+    elif args.embed:
+        benchmark.run_embedding_benchmark(args.models, args.batch_sizes, args.batches, args.limit)
     else:
         # If a specific prompt ID is provided, force regeneration is automatically true
         force_regenerate = args.force or args.prompt_id is not None
+        if args.evaluate and not args.plan:
+            start_evaluation_pipeline()
         benchmark.run_benchmark(
             models=args.models, 
             prompt_limit=args.limit, 
             force_regenerate=force_regenerate,
-            specific_prompt_id=args.prompt_id
-        )
\ No newline at end of file
+            specific_prompt_id=args.prompt_id,
+            option_grid=option_grid,
+            order=args.order,
+            plan_only=args.plan
+        )
+    
+    if benchmark.evaluation_pipeline:
+        benchmark.evaluation_pipeline.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,68 +4,81 @@
 
 import argparse
 import json
-import mysql.connector
-from mysql.connector import Error
-from google import genai
-from google.genai import types
+import storage
+from storage import Error
 import time
+import queue
+import threading
 from datetime import datetime
 import sys
 import os
 from dotenv import load_dotenv
+from response_store import fetch_response
+from llmbench import add_db_arguments, check_db_arguments, db_config_from_args
+
+# google-genai is imported when an evaluator is created, after arguments are parsed
 
 class LLMEvaluator:
     def __init__(self, db_config, gemini_api_key):
+        from google import genai
+        
         self.db_config = db_config
         self.gemini_client = genai.Client(api_key=gemini_api_key)
         self.model = "gemini-2.5-flash-preview-05-20"
     
     def connect_to_database(self):
-        """Establish connection to MySQL database"""
+        """Establish connection to the MySQL or SQLite database"""
         try:
-            connection = mysql.connector.connect(**self.db_config)
+            connection = storage.connect(self.db_config)
             if connection.is_connected():
-                print(f"Successfully connected to MySQL database: {self.db_config['database']}")
+                print(f"Successfully connected to database: {storage.database_name(self.db_config)}")
                 return connection
         except Error as e:
-            print(f"Error connecting to MySQL database: {e}")
+            print(f"Error connecting to database: {e}")
             return None
     
+    def create_evaluation_table(self, connection):
+        """Create the evaluation_results table if it does not exist yet"""
+        cursor = connection.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS evaluation_results (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                benchmark_result_id INT NOT NULL,
+                accuracy_score INT,
+                accuracy_justification TEXT,
+                completeness_score INT,
+                completeness_justification TEXT,
+                clarity_score INT,
+                clarity_justification TEXT,
+                domain_expertise_score INT,
+                domain_expertise_justification TEXT,
+                helpfulness_score INT,
+                helpfulness_justification TEXT,
+                overall_score DECIMAL(3,2),
+                overall_assessment TEXT,
+                key_strengths JSON,
+                key_weaknesses JSON,
+                evaluation_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (benchmark_result_id) REFERENCES benchmark_results(id)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci
+        """)
+        cursor.close()
+    
     def get_unevaluated_responses(self, connection):
         """Fetch responses that haven't been evaluated yet"""
         try:
-            cursor = connection.cursor(dictionary=True)
             # First, check if evaluation table exists, if not create it
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS evaluation_results (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    benchmark_result_id INT NOT NULL,
-                    accuracy_score INT,
-                    accuracy_justification TEXT,
-                    completeness_score INT,
-                    completeness_justification TEXT,
-                    clarity_score INT,
-                    clarity_justification TEXT,
-                    domain_expertise_score INT,
-                    domain_expertise_justification TEXT,
-                    helpfulness_score INT,
-                    helpfulness_justification TEXT,
-                    overall_score DECIMAL(3,2),
-                    overall_assessment TEXT,
-                    key_strengths JSON,
-                    key_weaknesses JSON,
-                    evaluation_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (benchmark_result_id) REFERENCES benchmark_results(id)
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci
-            """)
-            # Get responses that haven't been evaluated
+            self.create_evaluation_table(connection)
+            cursor = connection.cursor(dictionary=True)
+            # Get successful responses that haven't been evaluated, bodies are loaded
+            # one by one later. Partial text of failed or timed out runs is not evaluated.
             query = """
                 SELECT br.*, p.prompt_text
                 FROM benchmark_results br
+                JOIN benchmark_responses resp ON br.id = resp.result_id
                 LEFT JOIN evaluation_results er ON br.id = er.benchmark_result_id
                 LEFT JOIN prompts p ON br.prompt_id = p.id
-                WHERE br.response_text IS NOT NULL
-                AND er.benchmark_result_id IS NULL
+                WHERE er.benchmark_result_id IS NULL AND br.success = TRUE
                 ORDER BY br.id
             """
             cursor.execute(query)
@@ -159,6 +172,8 @@ Provide your evaluation in the following JSON format:
     
     def evaluate_response(self, original_prompt, model_response):
         """Evaluate a single response using Gemini API"""
+        from google.genai import types
+        
         try:
             evaluation_prompt = self.create_evaluation_prompt(original_prompt, model_response)
             contents = [
@@ -198,6 +213,14 @@ Provide your evaluation in the following JSON format:
             print(f"Error evaluating response: {e}")
             return None
     
+    def is_evaluated(self, connection, benchmark_result_id):
+        """Check whether a result already has an evaluation"""
+        cursor = connection.cursor()
+        cursor.execute("SELECT 1 FROM evaluation_results WHERE benchmark_result_id = %s LIMIT 1", (benchmark_result_id,))
+        evaluated = cursor.fetchone() is not None
+        cursor.close()
+        return evaluated
+    
     def save_evaluation(self, connection, benchmark_result_id, evaluation_data):
         """Save evaluation results to database"""
         try:
@@ -255,7 +278,7 @@ Provide your evaluation in the following JSON format:
                 print(f"\nEvaluating response {i}/{total_responses} - ID: {response['id']}, Model: {response['model']}")
                 # Get the original prompt - adjust this based on your prompts table structure
                 original_prompt = response.get('prompt_text', 'Original prompt not available')
-                model_response = response['response_text']
+                model_response = fetch_response(connection, response['id'])
                 # Evaluate the response
                 evaluation_data = self.evaluate_response(original_prompt, model_response)
                 if evaluation_data:
@@ -279,41 +302,171 @@ Provide your evaluation in the following JSON format:
             connection.close()
             print("Database connection closed.")
 
-def main():
+class EvaluationPipeline:
+    """
+    Evaluate benchmark results concurrently with their generation.
+    
+    Newly saved results are submitted to a bounded in-process queue drained by
+    several evaluator threads. A full queue blocks submit(), which throttles
+    generation instead of letting the backlog grow without limit. Errors are
+    counted per result and never stop an evaluator thread; should all threads
+    be gone anyway, submit() and close() drop results instead of blocking.
+    
+    With resume_backlog the responses left unevaluated by an interrupted run
+    are queued on start as well. Only one process should do that (benchmark.py
+    turns it off for --worker), otherwise concurrent processes would evaluate
+    the same results twice.
+    """
+    
+    # Seconds between checks for dead evaluator threads while the queue is full
+    PUT_TIMEOUT = 1.0
+    
+    def __init__(self, db_config, gemini_api_key, workers=2, queue_size=8, resume_backlog=True):
+        self.evaluator = LLMEvaluator(db_config, gemini_api_key)
+        self.workers = workers
+        self.resume_backlog = resume_backlog
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.threads = []
+        self.feeder = None
+        self.lock = threading.Lock()
+        self.successful_evaluations = 0
+        self.failed_evaluations = 0
+    
+    def start(self):
+        """Start the evaluator threads and queue responses left from earlier runs"""
+        connection = self.evaluator.connect_to_database()
+        if not connection:
+            raise RuntimeError("Evaluation pipeline could not connect to the database")
+        try:
+            if self.resume_backlog:
+                # Also creates evaluation_results when it does not exist yet
+                backlog = self.evaluator.get_unevaluated_responses(connection)
+            else:
+                self.evaluator.create_evaluation_table(connection)
+                backlog = []
+        finally:
+            connection.close()
+        
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"evaluator-{i + 1}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        
+        # Feed the backlog from its own thread so generation can start right away
+        self.feeder = threading.Thread(
+            target=lambda: [self.submit(row['id'], row.get('prompt_text')) for row in backlog],
+            name="evaluation-backlog",
+            daemon=True
+        )
+        self.feeder.start()
+    
+    def _put(self, item):
+        """Put an item on the queue, gives up and returns False once no evaluator thread is alive"""
+        while True:
+            try:
+                self.queue.put(item, timeout=self.PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                if not any(thread.is_alive() for thread in self.threads):
+                    return False
+    
+    def submit(self, benchmark_result_id, prompt_text, response_text=None):
+        """Queue a result for evaluation, blocks while the queue is full"""
+        if not self._put((benchmark_result_id, prompt_text, response_text)):
+            with self.lock:
+                self.failed_evaluations += 1
+            print(f"✗ No evaluator thread left, result {benchmark_result_id} not evaluated")
+    
+    def _evaluate(self, connection, benchmark_result_id, prompt_text, response_text):
+        """Evaluate and save one result, returns whether an evaluation was saved"""
+        if self.evaluator.is_evaluated(connection, benchmark_result_id):
+            print(f"Result {benchmark_result_id} is already evaluated, skipping")
+            return None
+        if response_text is None:
+            response_text = fetch_response(connection, benchmark_result_id)
+        evaluation_data = self.evaluator.evaluate_response(prompt_text or 'Original prompt not available', response_text)
+        if evaluation_data is None or not self.evaluator.save_evaluation(connection, benchmark_result_id, evaluation_data):
+            return False
+        print(f"✓ Evaluated result {benchmark_result_id} (Overall Score: {evaluation_data['overall_score']})")
+        return True
+    
+    def _worker(self):
+        """Evaluate queued results until a None sentinel arrives"""
+        connection = None
+        try:
+            while True:
+                item = self.queue.get()
+                if item is None:
+                    break
+                benchmark_result_id = item[0]
+                saved = False
+                try:
+                    if connection is None:
+                        connection = self.evaluator.connect_to_database()
+                    if connection is not None:
+                        saved = self._evaluate(connection, *item)
+                except Exception as e:
+                    # Incomplete Gemini JSON (KeyError), database errors, ...
+                    print(f"Error evaluating result {benchmark_result_id}: {e!r}")
+                    if isinstance(e, Error) and connection is not None:
+                        connection.close()
+                        connection = None
+                if saved is None:
+                    continue
+                with self.lock:
+                    if saved:
+                        self.successful_evaluations += 1
+                    else:
+                        self.failed_evaluations += 1
+                if not saved:
+                    print(f"✗ Failed to evaluate result {benchmark_result_id}")
+                # Add a small delay to avoid rate limiting
+                time.sleep(1)
+        finally:
+            if connection is not None:
+                connection.close()
+    
+    def close(self):
+        """Wait until every queued result is evaluated and stop the threads"""
+        if self.feeder:
+            self.feeder.join()
+        for _ in range(self.workers):
+            if not self._put(None):
+                break
+        for thread in self.threads:
+            thread.join()
+        print("\n=== Evaluation Summary ===")
+        print(f"Successful evaluations: {self.successful_evaluations}")
+        print(f"Failed evaluations: {self.failed_evaluations}")
+
+def get_gemini_api_key():
+    """Read the Gemini API key from the environment or the .env file"""
     # Load environment variables from .env file
     load_dotenv()
+    return os.getenv('GEMINI_API_KEY')
+
+def main(argv=None, prog=None):
+    """Command line interface, also used by `llmbench.py evaluate`."""
+    parser = argparse.ArgumentParser(prog=prog, description='Evaluate LLM responses using Gemini API')
+    add_db_arguments(parser)
+    
+    args = parser.parse_args(argv)
+    check_db_arguments(parser, args)
     
     # Get Gemini API key from environment
-    gemini_api_key = os.getenv('GEMINI_API_KEY')
+    gemini_api_key = get_gemini_api_key()
     if not gemini_api_key:
         print("Error: GEMINI_API_KEY not found in environment variables.")
         print("Please create a .env file with GEMINI_API_KEY=your_api_key_here")
-        sys.exit(1)
-    
-    parser = argparse.ArgumentParser(description='Evaluate LLM responses using Gemini API')
-    parser.add_argument('--host', required=True, help='MySQL host')
-    parser.add_argument('--port', type=int, default=3306, help='MySQL port')
-    parser.add_argument('--user', required=True, help='MySQL username')
-    parser.add_argument('--password', required=True, help='MySQL password')
-    parser.add_argument('--database', required=True, help='MySQL database name')
-    
-    args = parser.parse_args()
+        return 1
     
     # Database configuration
-    db_config = {
-        'host': args.host,
-        'port': args.port,
-        'user': args.user,
-        'password': args.password,
-        'database': args.database,
-        'charset': 'utf8mb4',
-        'use_unicode': True,
-        'autocommit': True
-    }
+    db_config = db_config_from_args(args, use_unicode=True, autocommit=True)
     
     # Initialize and run evaluator
     evaluator = LLMEvaluator(db_config, gemini_api_key)
     evaluator.run_evaluation()
+    return 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
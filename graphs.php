@@ -9,6 +9,7 @@
 
 // Include configuration file
 require_once 'config.php';
+require_once 'responses.php';
 
 // Get category filter from GET parameter
 $categoryFilter = isset($_GET['category']) ? trim($_GET['category']) : '';
@@ -72,11 +73,12 @@ try {
     $categoryQuery = $pdo->query("SELECT DISTINCT category FROM prompts WHERE category IS NOT NULL AND category != '' ORDER BY category");
     $categories = $categoryQuery->fetchAll(PDO::FETCH_COLUMN);
     
-    // Build WHERE clause for category filter
-    $categoryWhereClause = '';
+    // Build WHERE clause: results with default Ollama options only (option-grid
+    // runs are compared by benchmark.py --grid-report), filtered by category
+    $categoryWhereClause = 'WHERE br.options IS NULL';
     $categoryParams = [];
     if (!empty($categoryFilter)) {
-        $categoryWhereClause = 'WHERE p.category = :category';
+        $categoryWhereClause .= ' AND p.category = :category';
         $categoryParams['category'] = $categoryFilter;
     }
     
@@ -152,14 +154,15 @@ try {
     $promptResults = [];
     foreach ($prompts as $prompt) {
         $resultQuery = $pdo->prepare("
-            SELECT model, total_duration, success, response_text, error, mm.parameters
+            SELECT model, total_duration, success, resp.codec AS response_codec, resp.response_body, error, mm.parameters
             FROM benchmark_results br
+            LEFT JOIN benchmark_responses resp ON br.id = resp.result_id
             JOIN model_metadata mm ON br.model = mm.model_name
-            WHERE prompt_id = :promptId
+            WHERE prompt_id = :promptId AND br.options IS NULL
             ORDER BY total_duration ASC
         ");
         $resultQuery->execute(['promptId' => $prompt['id']]);
-        $promptResults[$prompt['id']] = $resultQuery->fetchAll(PDO::FETCH_ASSOC);
+        $promptResults[$prompt['id']] = decodeResponseRows($resultQuery->fetchAll(PDO::FETCH_ASSOC));
     }
     
 } catch (PDOException $e) {
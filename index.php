@@ -10,6 +10,7 @@
 
 // Include configuration file
 require_once 'config.php';
+require_once 'responses.php';
 
 // Get models to include from GET parameters, or use all models if not specified
 $selectedModels = isset($_GET['models']) ? explode(',', $_GET['models']) : [];
@@ -41,13 +42,15 @@ try {
         $modelMetadata[$metadata['model_name']] = $metadata;
     }
 
-    // Get benchmark results with evaluation scores
+    // Get benchmark results with evaluation scores (default Ollama options only,
+    // option-grid runs would add several results per prompt and model)
     $stmt = $pdo->prepare("
     SELECT 
         br.id,
         prompt_id, 
         br.model, 
-        response_text,
+        resp.codec AS response_codec,
+        resp.response_body,
         br.success,
         total_duration, 
         eval_count, 
@@ -71,13 +74,14 @@ try {
         er.overall_score,
         er.overall_assessment
     FROM benchmark_results br
+    LEFT JOIN benchmark_responses resp ON br.id = resp.result_id
     LEFT JOIN model_metadata mm ON br.model = mm.model_name
     LEFT JOIN evaluation_results er ON br.id = er.benchmark_result_id
-    WHERE br.model IN ($placeholders)
+    WHERE br.model IN ($placeholders) AND br.options IS NULL
     ORDER BY prompt_id, br.model
     ");
     $stmt->execute($selectedModels);
-    $results = $stmt->fetchAll();
+    $results = decodeResponseRows($stmt->fetchAll());
 
     $stmt = $pdo->prepare("SELECT SUM(total_duration) FROM `benchmark_results` WHERE 1");
     $stmt->execute();
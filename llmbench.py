@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Single entry point for the LLM benchmark tools.
+
+    python llmbench.py run      [DB options] [benchmark.py options]
+    python llmbench.py report   [summary|grid|embed|chat|pareto|compare A B] [DB options] [options]
+    python llmbench.py status   [DB options] [--sweep NAME]
+    python llmbench.py plot     [DB options] [results.py options]
+    python llmbench.py traces   [DB options] [--models M ...] [--result-ids ID ...]
+    python llmbench.py metadata [DB options]
+    python llmbench.py evaluate [DB options]
+
+DB options are --host/--port/--user/--password/--database for MySQL, or
+--sqlite FILE for an embedded database on a single host.
+
+Each subcommand imports only the module it dispatches to, so report and status
+calls do not load requests, pandas, matplotlib or google-genai. This module is
+also where the database options shared by all tools are defined.
+"""
+import argparse
+import importlib
+import sys
+
+# Subcommand -> (module, arguments prepended to the forwarded ones, help)
+SUBCOMMANDS = {
+    'run': ('benchmark', [], 'Run benchmarks (all benchmark.py options)'),
+    'report': ('benchmark', [], 'Print a report: summary (default), grid, embed, chat, pareto or compare'),
+    'status': ('benchmark', ['--queue-status'], 'Show the job queue status of a sweep'),
+    'plot': ('results', [], 'Generate charts from benchmark results'),
+    'traces': ('results', ['--traces'], 'Plot token rate over time and find throughput drops in token traces'),
+    'metadata': ('model_metadata', [], 'Collect Ollama model metadata'),
+    'evaluate': ('gemini_evaluate', [], 'Evaluate responses with Gemini'),
+}
+
+# Report kind -> benchmark.py flag
+REPORTS = {
+    'summary': '--report',
+    'grid': '--grid-report',
+    'embed': '--embed-report',
+    'chat': '--chat-report',
+    'pareto': '--pareto',
+    'compare': '--compare',
+}
+
+
+def add_db_arguments(parser):
+    """Add the database options shared by all tools to a parser."""
+    parser.add_argument('--host', default='localhost', help='MySQL host')
+    parser.add_argument('--port', type=int, default=3306, help='MySQL port')
+    parser.add_argument('--user', help='MySQL username (required without --sqlite)')
+    parser.add_argument('--password', help='MySQL password (required without --sqlite)')
+    parser.add_argument('--database', default='llm_benchmark', help='MySQL database name')
+    parser.add_argument('--sqlite', metavar='FILE', help='Use an embedded SQLite database file instead of MySQL')
+    parser.add_argument('--commit-batch', type=int, default=1,
+                        help='With --sqlite, results grouped into one transaction (other processes wait for the write lock meanwhile)')
+
+
+def check_db_arguments(parser, args):
+    """Exit with a usage error when neither MySQL credentials nor --sqlite are given."""
+    if not args.sqlite and (args.user is None or args.password is None):
+        parser.error("--user and --password are required unless --sqlite is given")
+
+
+def db_config_from_args(args, **extra):
+    """
+    Build the storage.connect() configuration from parsed database options.
+    
+    With --sqlite the configuration names the database file, extra
+    mysql.connector options are dropped except autocommit.
+    """
+    if args.sqlite:
+        db_config = {'sqlite': args.sqlite, 'commit_batch': args.commit_batch}
+        if 'autocommit' in extra:
+            db_config['autocommit'] = extra['autocommit']
+        return db_config
+    db_config = {
+        'host': args.host,
+        'port': args.port,
+        'user': args.user,
+        'password': args.password,
+        'database': args.database,
+        'charset': 'utf8mb4'
+    }
+    db_config.update(extra)
+    return db_config
+
+
+def main(argv=None):
+    """Dispatch a subcommand to the main function of its module."""
+    parser = argparse.ArgumentParser(
+        description='LLM Benchmark tools',
+        epilog='Subcommands: ' + '; '.join(f"{name}: {info[2]}" for name, info in SUBCOMMANDS.items())
+    )
+    parser.add_argument('command', choices=SUBCOMMANDS, help='Subcommand to run')
+    parser.add_argument('args', nargs=argparse.REMAINDER, help='Options of the subcommand, see <command> --help')
+    args = parser.parse_args(argv)
+
+    module_name, forwarded, _ = SUBCOMMANDS[args.command]
+    forwarded = forwarded + args.args
+    if args.command == 'report':
+        kind = 'summary'
+        if forwarded and forwarded[0] in REPORTS:
+            kind = forwarded.pop(0)
+        forwarded = [REPORTS[kind]] + forwarded
+
+    module = importlib.import_module(module_name)
+    return module.main(forwarded, prog=f"{parser.prog} {args.command}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
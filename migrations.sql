@@ -0,0 +1,141 @@
+-- Migrations for databases created with an earlier version of schema.sql.
+-- schema.sql always describes the current layout; apply only the sections
+-- that are newer than your database, in order.
+
+USE llm_benchmark;
+
+-- Ollama options block (canonical JSON) stored with each result, NULL for defaults
+ALTER TABLE benchmark_results ADD COLUMN options VARCHAR(255) AFTER model;
+ALTER TABLE benchmark_results ADD INDEX (model, prompt_id, options);
+
+-- Content hash of prompt_text used to deduplicate prompts, computed by MySQL.
+-- Adding the unique key fails if the table already contains duplicate prompts;
+-- remove or edit those first.
+ALTER TABLE prompts ADD COLUMN content_hash CHAR(64) AS (SHA2(prompt_text, 256)) STORED UNIQUE AFTER tags;
+-- Databases that got content_hash as a plain column from an earlier version of
+-- this file (NULL for prompts inserted without it) run this instead:
+-- ALTER TABLE prompts MODIFY content_hash CHAR(64) AS (SHA2(prompt_text, 256)) STORED;
+
+-- Response bodies moved to a compressed side table. After creating the table run
+-- python benchmark.py ... --migrate-responses
+-- which copies response_text in batches and drops the column.
+CREATE TABLE IF NOT EXISTS benchmark_responses (
+    result_id INT PRIMARY KEY,
+    codec VARCHAR(8) NOT NULL,
+    response_body MEDIUMBLOB,
+    FOREIGN KEY (result_id) REFERENCES benchmark_results(id)
+);
+
+-- Outcome of each request: 'ok', 'truncated' (token budget reached),
+-- 'timeout' (wall-clock budget reached, generation cancelled) or 'error'
+ALTER TABLE benchmark_results ADD COLUMN status VARCHAR(16) AFTER success;
+UPDATE benchmark_results SET status = IF(success, 'ok', 'error') WHERE status IS NULL;
+
+-- Job queue shared by benchmark.py --worker processes. Workers lease jobs with
+-- SELECT ... FOR UPDATE SKIP LOCKED (MySQL 8.0+ / MariaDB 10.6+)
+CREATE TABLE IF NOT EXISTS benchmark_jobs (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    sweep VARCHAR(100) NOT NULL,
+    model VARCHAR(100) NOT NULL,
+    options TEXT,
+    prompt_id INT NOT NULL,
+    status VARCHAR(16) NOT NULL DEFAULT 'pending',
+    worker VARCHAR(100),
+    lease_expires DATETIME,
+    attempts INT NOT NULL DEFAULT 0,
+    result_id INT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (prompt_id) REFERENCES prompts(id),
+    INDEX (sweep, status, lease_expires)
+);
+
+-- Table to store embedding benchmark results, one row per /api/embed batch
+CREATE TABLE IF NOT EXISTS embedding_results (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    model VARCHAR(100) NOT NULL,
+    batch_size INT NOT NULL,
+    input_count INT,
+    success BOOLEAN NOT NULL,
+    error TEXT,
+    total_duration FLOAT,
+    load_duration FLOAT,
+    prompt_eval_count INT,
+    embedding_length INT,
+    timestamp DATETIME,
+    INDEX (model, batch_size)
+);
+
+-- Table to store conversation benchmark turns. 'warm' turns reuse the cached
+-- history prefix, 'cold' turns replay the same history with the cache invalidated
+CREATE TABLE IF NOT EXISTS conversation_results (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    model VARCHAR(100) NOT NULL,
+    conversation VARCHAR(100) NOT NULL,
+    turn INT NOT NULL,
+    mode VARCHAR(8) NOT NULL,
+    success BOOLEAN NOT NULL,
+    error TEXT,
+    total_duration FLOAT,
+    eval_count INT,
+    eval_duration FLOAT,
+    prompt_eval_count INT,
+    prompt_eval_duration FLOAT,
+    timestamp DATETIME,
+    INDEX (model, turn)
+);
+
+-- Table to store benchmark runs: environment fingerprint and settings of each
+-- invocation, so results from different Ollama versions or model builds can be compared
+CREATE TABLE IF NOT EXISTS benchmark_runs (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    host VARCHAR(255),
+    ollama_url VARCHAR(255),
+    ollama_version VARCHAR(50),
+    model_digests JSON,
+    options TEXT,
+    started_at DATETIME,
+    finished_at DATETIME
+);
+ALTER TABLE benchmark_results ADD COLUMN run_id INT AFTER id, ADD INDEX (run_id);
+ALTER TABLE embedding_results ADD COLUMN run_id INT AFTER id;
+ALTER TABLE conversation_results ADD COLUMN run_id INT AFTER id;
+
+-- Per-token timing traces recorded with --trace-tokens
+CREATE TABLE IF NOT EXISTS benchmark_token_traces (
+    result_id INT PRIMARY KEY,
+    token_count INT NOT NULL,
+    trace MEDIUMBLOB NOT NULL,
+    FOREIGN KEY (result_id) REFERENCES benchmark_results(id)
+);
+
+-- Index used by workers to lease jobs for the model they already have loaded
+ALTER TABLE benchmark_jobs ADD INDEX (sweep, model, status);
+
+-- Row id in another database -> row id here of everything copied in by
+-- benchmark.py --sync (from a SQLite file) or --import, per source database.
+-- Written in the same transaction as the copied rows, so repeated or
+-- interrupted copies only add new rows
+CREATE TABLE IF NOT EXISTS sync_map (
+    source CHAR(36) NOT NULL,
+    table_name VARCHAR(64) NOT NULL,
+    local_id INT NOT NULL,
+    remote_id INT NOT NULL,
+    PRIMARY KEY (source, table_name, local_id)
+);
+
+-- Identity of this database in the sync_map of databases its exports are
+-- imported into (one row, created by the first --export)
+CREATE TABLE IF NOT EXISTS sync_source (
+    source CHAR(36) PRIMARY KEY
+);
+
+-- Option blocks longer than 255 characters (stop sequences, long grids):
+-- options becomes TEXT, indexed by its first 255 characters. model_2 is the
+-- name MySQL gave the (model, prompt_id, options) index above, check it with
+-- SHOW INDEX FROM benchmark_results
+ALTER TABLE benchmark_results
+    DROP INDEX model_2,
+    MODIFY options TEXT,
+    ADD INDEX benchmark_results_pair (model, prompt_id, options(255));
+ALTER TABLE benchmark_jobs MODIFY options TEXT;
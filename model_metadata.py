@@ -3,20 +3,19 @@ import subprocess
 import json
 import re
 import argparse
-import mysql.connector
+import storage
 from datetime import datetime
 import sys
 import locale
+from llmbench import add_db_arguments, check_db_arguments, db_config_from_args
 
-def parse_args():
+def parse_args(argv=None, prog=None):
     """Parse command line arguments."""
-    parser = argparse.ArgumentParser(description='Collect Ollama model metadata and store in MySQL database.')
-    parser.add_argument('--host', default='localhost', help='MySQL host')
-    parser.add_argument('--port', type=int, default=3306, help='MySQL port')
-    parser.add_argument('--user', required=True, help='MySQL username')
-    parser.add_argument('--password', required=True, help='MySQL password')
-    parser.add_argument('--database', default='llm_benchmark', help='MySQL database name')
-    return parser.parse_args()
+    parser = argparse.ArgumentParser(prog=prog, description='Collect Ollama model metadata and store in the benchmark database.')
+    add_db_arguments(parser)
+    args = parser.parse_args(argv)
+    check_db_arguments(parser, args)
+    return args
 
 def run_command(cmd):
     """Run a shell command and return the output."""
@@ -219,20 +218,14 @@ def insert_or_update_metadata(conn, metadata):
     conn.commit()
     cursor.close()
 
-def main():
-    """Main function to get all models and their metadata."""
-    args = parse_args()
+def main(argv=None, prog=None):
+    """Main function to get all models and their metadata, also used by `llmbench.py metadata`."""
+    args = parse_args(argv, prog)
     
     # Connect to database
     try:
-        conn = mysql.connector.connect(
-            host=args.host,
-            port=args.port,
-            user=args.user,
-            password=args.password,
-            database=args.database
-        )
-    except mysql.connector.Error as e:
+        conn = storage.connect(db_config_from_args(args))
+    except storage.Error as e:
         print(f"Database connection error: {e}")
         sys.exit(1)
     
@@ -262,6 +255,7 @@ def main():
     
     conn.close()
     print("Processing complete")
+    return 0
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""
+Compressed storage of model responses.
+
+Response bodies are kept out of benchmark_results in the benchmark_responses
+side table, compressed with zlib (default) or zstd, so that metric queries only
+scan narrow numeric rows. Bodies are fetched one at a time when a response is
+actually shown or evaluated.
+"""
+import zlib
+from typing import Optional
+
+RESPONSE_CODECS = ['zlib', 'zstd']
+
+
+def compress_response(text: str, codec: str = 'zlib') -> bytes:
+    """Compress a response text with the given codec."""
+    data = text.encode('utf-8')
+    if codec == 'zstd':
+        import zstandard
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return zlib.compress(data, 6)
+
+
+def decompress_response(body: Optional[bytes], codec: str) -> Optional[str]:
+    """Decompress a response body stored with compress_response."""
+    if body is None:
+        return None
+    if codec == 'zstd':
+        import zstandard
+        data = zstandard.ZstdDecompressor().decompress(bytes(body))
+    else:
+        data = zlib.decompress(bytes(body))
+    return data.decode('utf-8')
+
+
+def save_response(connection, result_id: int, text: str, codec: str = 'zlib') -> None:
+    """Store a response body for a benchmark result, the caller commits."""
+    cursor = connection.cursor()
+    cursor.execute(
+        "INSERT INTO benchmark_responses (result_id, codec, response_body) VALUES (%s, %s, %s)",
+        (result_id, codec, compress_response(text, codec))
+    )
+    cursor.close()
+
+
+def fetch_response(connection, result_id: int) -> Optional[str]:
+    """Load and decompress the response body of a benchmark result."""
+    cursor = connection.cursor()
+    cursor.execute(
+        "SELECT codec, response_body FROM benchmark_responses WHERE result_id = %s",
+        (result_id,)
+    )
+    row = cursor.fetchone()
+    cursor.close()
+    if row is None:
+        return None
+    return decompress_response(row[1], row[0])
@@ -0,0 +1,46 @@
+<?php
+/**
+ * responses.php
+ *
+ * Helpers for response bodies stored compressed in the benchmark_responses table.
+ * zlib bodies are handled by the standard zlib extension, zstd bodies need the
+ * PHP zstd extension.
+ */
+
+/**
+ * Decompress a response body stored by benchmark.py
+ *
+ * @param string|null $codec Codec name stored with the body ('zlib' or 'zstd')
+ * @param string|null $body Compressed response body
+ * @return string|null Response text, or null if there is no response
+ */
+function decodeResponseBody($codec, $body) {
+    if ($body === null) {
+        return null;
+    }
+    if ($codec === 'zstd') {
+        if (!function_exists('zstd_uncompress')) {
+            return '[zstd-compressed response, PHP zstd extension not installed]';
+        }
+        $text = zstd_uncompress($body);
+    } else {
+        $text = gzuncompress($body);
+    }
+    return $text === false ? '[response could not be decompressed]' : $text;
+}
+
+/**
+ * Replace the response_codec/response_body columns of result rows with response_text
+ *
+ * @param array $rows Result rows fetched with a LEFT JOIN on benchmark_responses
+ * @return array Rows with a decompressed 'response_text' column
+ */
+function decodeResponseRows(array $rows) {
+    foreach ($rows as &$row) {
+        $row['response_text'] = decodeResponseBody($row['response_codec'], $row['response_body']);
+        unset($row['response_codec'], $row['response_body']);
+    }
+    unset($row);
+    return $rows;
+}
+?>
@@ -1,47 +1,120 @@
-import mysql.connector
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import argparse
+import os
+import re
+import storage
+from token_trace import decode_trace
+from llmbench import add_db_arguments, check_db_arguments, db_config_from_args
 
-def visualize_benchmark_results(db_config):
+# pandas, numpy, matplotlib and seaborn are imported by the functions that use them
+
+# Directory of the Parquet results caches, one file per database
+CACHE_DIR = 'benchmark_results'
+# Ids below the highest cached id that are read again on every load. MySQL
+# assigns auto-increment ids at insert time, so a row of a longer transaction
+# (an --import batch, a concurrent worker) can commit after rows with higher ids
+CACHE_RECHECK_IDS = 10000
+# Tokens per sliding window of the token-rate curve
+DEFAULT_TRACE_WINDOW = 16
+# A window slower than this fraction of the response's median rate is a drop
+DEFAULT_DROP_THRESHOLD = 0.5
+
+def default_cache_path(db_config):
+    """Parquet cache file of a database, so results of different databases never mix."""
+    name = storage.database_name(db_config)
+    if not db_config.get('sqlite'):
+        name = f"{db_config.get('host')}_{name}"
+    return os.path.join(CACHE_DIR, f"results_cache_{re.sub(r'[^A-Za-z0-9_.-]+', '_', name)}.parquet")
+
+def load_results(conn, cache_path, refresh=False):
+    """
+    Load benchmark results through a local Parquet cache.
+    
+    Only rows with an id above the highest cached id minus CACHE_RECHECK_IDS
+    are fetched from the database and replace that tail of the cache, so rows
+    committed after rows with higher ids are picked up too. Older rows changed
+    in place (e.g. a thumbs up/down rating in the web interface) are only picked
+    up with refresh=True. A cache written without the options column is rebuilt.
+    
+    Args:
+        conn: Open database connection (storage.connect)
+        cache_path: Path of the Parquet cache file
+        refresh: Whether to discard the cache and reload all rows
+        
+    Returns:
+        DataFrame with one row per benchmark result
+    """
+    import pandas as pd
+    
+    cached = None
+    min_id = 0
+    if not refresh and os.path.exists(cache_path):
+        cached = pd.read_parquet(cache_path)
+        if 'options' not in cached.columns:
+            cached = None
+        elif not cached.empty:
+            min_id = max(int(cached['id'].max()) - CACHE_RECHECK_IDS, 0)
+    
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT r.id, r.model, r.options, r.prompt_id, p.category, r.success,
+               r.total_duration, r.eval_count, r.eval_duration
+        FROM benchmark_results r
+        LEFT JOIN prompts p ON r.prompt_id = p.id
+        WHERE r.id > %s
+        ORDER BY r.id
+    """, (min_id,))
+    new_rows = pd.DataFrame(cursor.fetchall(), columns=cursor.column_names)
+    cursor.close()
+    
+    if cached is not None:
+        recheck = cached['id'] > min_id
+        added = len(set(new_rows['id']) - set(cached.loc[recheck, 'id']))
+        if not added:
+            print(f"Loaded {len(cached)} results from cache, no new rows")
+            return cached
+        cached = cached[~recheck]
+    else:
+        added = len(new_rows)
+    
+    new_rows['success'] = new_rows['success'].astype(bool)
+    results = new_rows if cached is None else pd.concat([cached, new_rows], ignore_index=True)
+    
+    os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+    results.to_parquet(cache_path, index=False)
+    print(f"Fetched {added} new results, {len(results)} results cached in {cache_path}")
+    return results
+
+def visualize_benchmark_results(db_config, cache_path=None, refresh=False):
     """
     Generate visualizations from benchmark results.
     
     Args:
-        db_config: Dictionary with MySQL connection parameters
+        db_config: storage.connect() configuration (MySQL or SQLite)
+        cache_path: Path of the local Parquet cache of benchmark results,
+            default_cache_path(db_config) if not given
+        refresh: Whether to rebuild the cache from scratch
     """
     try:
-        # Connect to database
-        conn = mysql.connector.connect(**db_config)
-        cursor = conn.cursor(dictionary=True)
+        import matplotlib.pyplot as plt
+        import seaborn as sns
         
-        # Get model performance data
-        query = """
-            SELECT model, 
-                   AVG(total_duration) as avg_duration,
-                   AVG(eval_count) as avg_eval_count
-            FROM benchmark_results
-            WHERE success = 1
-            GROUP BY model
-        """
-        cursor.execute(query)
-        model_perf = pd.DataFrame(cursor.fetchall())
+        # Connect to database, fetch new rows only and close right away
+        conn = storage.connect(db_config)
+        results = load_results(conn, cache_path or default_cache_path(db_config), refresh)
+        conn.close()
         
-        # Get category performance by model
-        query = """
-            SELECT p.category, r.model,
-                   AVG(total_duration) as avg_duration
-            FROM benchmark_results r
-            JOIN prompts p ON r.prompt_id = p.id
-            WHERE r.success = 1
-            GROUP BY p.category, r.model
-        """
-        cursor.execute(query)
-        category_perf = pd.DataFrame(cursor.fetchall())
+        # All aggregates are computed in memory from the cached frame, on results with
+        # default options (option-grid runs are compared by benchmark.py --grid-report)
+        successful = results[results['success'] & results['options'].isna()]
+        model_perf = successful.groupby('model', as_index=False).agg(
+            avg_duration=('total_duration', 'mean'),
+            avg_eval_count=('eval_count', 'mean')
+        )
+        category_perf = successful.groupby(['category', 'model'], as_index=False).agg(
+            avg_duration=('total_duration', 'mean')
+        )
         
         # Create a directory for the visualizations
-        import os
         os.makedirs("benchmark_results", exist_ok=True)
         
         # Plot model performance
@@ -77,31 +150,168 @@ def visualize_benchmark_results(db_config):
         plt.tight_layout()
         plt.savefig('benchmark_results/category_performance.png')
         
-        # Close database connection
+        print("Visualizations generated in benchmark_results/ directory")
+        
+    except Exception as e:
+        print(f"Error generating visualizations: {str(e)}")
+
+def token_rates(arrivals, window=DEFAULT_TRACE_WINDOW):
+    """
+    Token rate over a sliding window of tokens.
+    
+    Args:
+        arrivals: Token arrival times in seconds (token_trace.decode_trace)
+        window: Number of tokens per window
+        
+    Returns:
+        Tuple (times, rates): end time of each window and its tokens per second
+    """
+    import numpy as np
+    
+    if len(arrivals) <= window:
+        return np.empty(0), np.empty(0)
+    spans = arrivals[window:] - arrivals[:-window]
+    return arrivals[window:], window / np.maximum(spans, 1e-6)
+
+def find_throughput_drops(arrivals, rates, window=DEFAULT_TRACE_WINDOW, threshold=DEFAULT_DROP_THRESHOLD):
+    """
+    Find the stretches of a response generated well below its median rate.
+    
+    Args:
+        arrivals: Token arrival times in seconds
+        rates: Windowed rates from token_rates
+        window: Window size used for rates
+        threshold: Fraction of the median rate below which a window counts as a drop
+        
+    Returns:
+        List of drops with start/end time (seconds) and the lowest rate
+    """
+    import numpy as np
+    
+    if len(rates) == 0:
+        return []
+    slow = (rates < threshold * np.median(rates)).astype(np.int8)
+    edges = np.diff(np.concatenate(([0], slow, [0])))
+    drops = []
+    for first, last in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1):
+        drops.append({
+            "start": round(float(arrivals[first]), 3),
+            "end": round(float(arrivals[last + window]), 3),
+            "min_rate": round(float(rates[first:last + 1].min()), 2)
+        })
+    return drops
+
+def analyze_token_traces(db_config, models=None, result_ids=None, limit=20, window=DEFAULT_TRACE_WINDOW,
+                         threshold=DEFAULT_DROP_THRESHOLD, output='benchmark_results/token_rates.png'):
+    """
+    Plot token rate over time of traced results and detect throughput drops.
+    
+    Args:
+        db_config: storage.connect() configuration (MySQL or SQLite)
+        models: Optional models to include
+        result_ids: Optional benchmark result IDs to include
+        limit: Maximum number of (most recent) traces
+        window: Tokens per sliding window
+        threshold: Fraction of the median rate below which a window counts as a drop
+        output: Path of the chart
+        
+    Returns:
+        List of per-result summaries
+    """
+    try:
+        import numpy as np
+        import matplotlib.pyplot as plt
+        
+        conn = storage.connect(db_config)
+        cursor = conn.cursor(dictionary=True)
+        query = """
+            SELECT r.id, r.model, r.prompt_id, r.status, t.trace
+            FROM benchmark_token_traces t
+            JOIN benchmark_results r ON r.id = t.result_id
+        """
+        conditions = []
+        params = []
+        if models:
+            conditions.append(f"r.model IN ({', '.join(['%s'] * len(models))})")
+            params.extend(models)
+        if result_ids:
+            conditions.append(f"r.id IN ({', '.join(['%s'] * len(result_ids))})")
+            params.extend(result_ids)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY r.id DESC LIMIT %s"
+        params.append(limit)
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
         cursor.close()
         conn.close()
         
-        print("Visualizations generated in benchmark_results/ directory")
+        if not rows:
+            print("No token traces found, run benchmark.py with --trace-tokens first")
+            return []
+        
+        summaries = []
+        plt.figure(figsize=(14, 7))
+        for row in reversed(rows):
+            arrivals = decode_trace(row['trace'])
+            times, rates = token_rates(arrivals, window)
+            drops = find_throughput_drops(arrivals, rates, window, threshold)
+            summaries.append({
+                "result_id": row['id'],
+                "model": row['model'],
+                "prompt_id": row['prompt_id'],
+                "status": row['status'],
+                "tokens": len(arrivals),
+                "first_token": round(float(arrivals[0]), 3) if len(arrivals) else None,
+                "median_rate": round(float(np.median(rates)), 2) if len(rates) else None,
+                "drops": drops
+            })
+            if len(rates):
+                plt.plot(times, rates, label=f"{row['model']} #{row['id']}")
+            
+            drop_text = ", ".join(f"{d['start']:.1f}-{d['end']:.1f}s ({d['min_rate']} tok/s)" for d in drops) or "none"
+            print(f"Result {row['id']} ({row['model']}, prompt {row['prompt_id']}): {len(arrivals)} tokens, "
+                  f"median {summaries[-1]['median_rate']} tok/s, drops: {drop_text}")
+        
+        plt.title(f'Token Rate over Time ({window}-token window)')
+        plt.xlabel('Time since request (seconds)')
+        plt.ylabel('Tokens per second')
+        if len(rows) <= 10:
+            plt.legend()
+        plt.tight_layout()
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+        plt.savefig(output)
+        print(f"Token rate chart saved to {output}")
+        return summaries
         
     except Exception as e:
-        print(f"Error generating visualizations: {str(e)}")
+        print(f"Error analyzing token traces: {str(e)}")
+        return []
+
+def main(argv=None, prog=None):
+    """Command line interface, also used by `llmbench.py plot`."""
+    parser = argparse.ArgumentParser(prog=prog, description='LLM Benchmark Results Visualizer')
+    add_db_arguments(parser)
+    parser.add_argument('--cache', help=f'Path of the local Parquet results cache (default: one file per database in {CACHE_DIR}/)')
+    parser.add_argument('--refresh-cache', action='store_true', help='Rebuild the results cache from scratch')
+    parser.add_argument('--traces', action='store_true', help='Analyze per-token timing traces instead of the summary charts')
+    parser.add_argument('--models', nargs='+', help='Models whose traces are analyzed')
+    parser.add_argument('--result-ids', type=int, nargs='+', help='Benchmark result IDs whose traces are analyzed')
+    parser.add_argument('--limit', type=int, default=20, help='Maximum number of most recent traces analyzed')
+    parser.add_argument('--window', type=int, default=DEFAULT_TRACE_WINDOW, help='Tokens per window of the token-rate curve')
+    parser.add_argument('--drop-threshold', type=float, default=DEFAULT_DROP_THRESHOLD,
+                        help='Fraction of the median rate below which a window is reported as a throughput drop')
+    
+    args = parser.parse_args(argv)
+    check_db_arguments(parser, args)
+    
+    db_config = db_config_from_args(args)
+    
+    if args.traces:
+        analyze_token_traces(db_config, args.models, args.result_ids, args.limit, args.window, args.drop_threshold)
+    else:
+        visualize_benchmark_results(db_config, args.cache, args.refresh_cache)
+    return 0
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description='LLM Benchmark Results Visualizer')
-    parser.add_argument('--host', default='localhost', help='MySQL host')
-    parser.add_argument('--port', type=int, default=3306, help='MySQL port')
-    parser.add_argument('--user', required=True, help='MySQL username')
-    parser.add_argument('--password', required=True, help='MySQL password')
-    parser.add_argument('--database', required=True, help='MySQL database name')
-    
-    args = parser.parse_args()
-    
-    db_config = {
-        'host': args.host,
-        'port': args.port,
-        'user': args.user,
-        'password': args.password,
-        'database': args.database
-    }
-    
-    visualize_benchmark_results(db_config)
\ No newline at end of file
+    main()
\ No newline at end of file
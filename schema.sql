@@ -9,16 +9,33 @@ CREATE TABLE IF NOT EXISTS prompts (
     prompt_text TEXT NOT NULL,
     category VARCHAR(100),
     tags TEXT,
+    -- Computed by MySQL, so every way of inserting a prompt deduplicates by content
+    content_hash CHAR(64) AS (SHA2(prompt_text, 256)) STORED UNIQUE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Table to store benchmark runs: environment fingerprint and settings of each
+-- invocation, so results from different Ollama versions or model builds can be compared
+CREATE TABLE IF NOT EXISTS benchmark_runs (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    host VARCHAR(255),
+    ollama_url VARCHAR(255),
+    ollama_version VARCHAR(50),
+    model_digests JSON,
+    options TEXT,
+    started_at DATETIME,
+    finished_at DATETIME
+);
+
 -- Table to store benchmark results
 CREATE TABLE IF NOT EXISTS benchmark_results (
     id INT AUTO_INCREMENT PRIMARY KEY,
+    run_id INT,
     prompt_id INT NOT NULL,
     model VARCHAR(100) NOT NULL,
+    options TEXT,
     success BOOLEAN NOT NULL,
-    response_text TEXT,
+    status VARCHAR(16),
     error TEXT,
     total_duration FLOAT,
     eval_count INT,
@@ -29,7 +46,85 @@ CREATE TABLE IF NOT EXISTS benchmark_results (
     timestamp DATETIME,
     FOREIGN KEY (prompt_id) REFERENCES prompts(id),
     INDEX (model),
-    INDEX (prompt_id)
+    INDEX (prompt_id),
+    INDEX benchmark_results_pair (model, prompt_id, options(255)),
+    INDEX (run_id)
+);
+
+-- Table to store embedding benchmark results, one row per /api/embed batch
+CREATE TABLE IF NOT EXISTS embedding_results (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    run_id INT,
+    model VARCHAR(100) NOT NULL,
+    batch_size INT NOT NULL,
+    input_count INT,
+    success BOOLEAN NOT NULL,
+    error TEXT,
+    total_duration FLOAT,
+    load_duration FLOAT,
+    prompt_eval_count INT,
+    embedding_length INT,
+    timestamp DATETIME,
+    INDEX (model, batch_size)
+);
+
+-- Table to store conversation benchmark turns. 'warm' turns reuse the cached
+-- history prefix, 'cold' turns replay the same history with the cache invalidated
+CREATE TABLE IF NOT EXISTS conversation_results (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    run_id INT,
+    model VARCHAR(100) NOT NULL,
+    conversation VARCHAR(100) NOT NULL,
+    turn INT NOT NULL,
+    mode VARCHAR(8) NOT NULL,
+    success BOOLEAN NOT NULL,
+    error TEXT,
+    total_duration FLOAT,
+    eval_count INT,
+    eval_duration FLOAT,
+    prompt_eval_count INT,
+    prompt_eval_duration FLOAT,
+    timestamp DATETIME,
+    INDEX (model, turn)
+);
+
+-- Table to store response bodies, compressed (codec 'zlib' or 'zstd'), kept out
+-- of benchmark_results so metric queries only scan narrow rows
+CREATE TABLE IF NOT EXISTS benchmark_responses (
+    result_id INT PRIMARY KEY,
+    codec VARCHAR(8) NOT NULL,
+    response_body MEDIUMBLOB,
+    FOREIGN KEY (result_id) REFERENCES benchmark_results(id)
+);
+
+-- Table to store per-token arrival times of streamed generations (--trace-tokens):
+-- little-endian uint32 microseconds, the time to the first token followed by the
+-- gaps between tokens
+CREATE TABLE IF NOT EXISTS benchmark_token_traces (
+    result_id INT PRIMARY KEY,
+    token_count INT NOT NULL,
+    trace MEDIUMBLOB NOT NULL,
+    FOREIGN KEY (result_id) REFERENCES benchmark_results(id)
+);
+
+-- Job queue shared by benchmark.py --worker processes. Workers lease jobs with
+-- SELECT ... FOR UPDATE SKIP LOCKED (MySQL 8.0+ / MariaDB 10.6+)
+CREATE TABLE IF NOT EXISTS benchmark_jobs (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    sweep VARCHAR(100) NOT NULL,
+    model VARCHAR(100) NOT NULL,
+    options TEXT,
+    prompt_id INT NOT NULL,
+    status VARCHAR(16) NOT NULL DEFAULT 'pending',
+    worker VARCHAR(100),
+    lease_expires DATETIME,
+    attempts INT NOT NULL DEFAULT 0,
+    result_id INT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (prompt_id) REFERENCES prompts(id),
+    INDEX (sweep, status, lease_expires),
+    INDEX (sweep, model, status)
 );
 
 -- Sample data for the prompts table
@@ -54,4 +149,22 @@ CREATE TABLE IF NOT EXISTS model_metadata (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX (model_name)
-);
\ No newline at end of file
+);
+
+-- Row id in another database -> row id here of everything copied in by
+-- benchmark.py --sync (from a SQLite file) or --import, per source database.
+-- Written in the same transaction as the copied rows, so repeated or
+-- interrupted copies only add new rows
+CREATE TABLE IF NOT EXISTS sync_map (
+    source CHAR(36) NOT NULL,
+    table_name VARCHAR(64) NOT NULL,
+    local_id INT NOT NULL,
+    remote_id INT NOT NULL,
+    PRIMARY KEY (source, table_name, local_id)
+);
+
+-- Identity of this database in the sync_map of databases its exports are
+-- imported into (one row, created by the first --export)
+CREATE TABLE IF NOT EXISTS sync_source (
+    source CHAR(36) PRIMARY KEY
+);
@@ -0,0 +1,181 @@
+-- SQLite version of schema.sql, used by the --sqlite backend (storage.py).
+-- It is applied automatically when a new database file is opened.
+
+-- Table to store prompts
+CREATE TABLE IF NOT EXISTS prompts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    prompt_text TEXT NOT NULL,
+    category VARCHAR(100),
+    tags TEXT,
+    content_hash CHAR(64) GENERATED ALWAYS AS (SHA2(prompt_text, 256)) STORED UNIQUE,
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+
+-- Table to store benchmark runs
+CREATE TABLE IF NOT EXISTS benchmark_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    host VARCHAR(255),
+    ollama_url VARCHAR(255),
+    ollama_version VARCHAR(50),
+    model_digests JSON,
+    options TEXT,
+    started_at DATETIME,
+    finished_at DATETIME
+);
+
+-- Table to store benchmark results
+CREATE TABLE IF NOT EXISTS benchmark_results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INT,
+    prompt_id INT NOT NULL REFERENCES prompts(id),
+    model VARCHAR(100) NOT NULL,
+    options TEXT,
+    success BOOLEAN NOT NULL,
+    status VARCHAR(16),
+    error TEXT,
+    total_duration FLOAT,
+    eval_count INT,
+    eval_duration FLOAT,
+    load_duration FLOAT,
+    prompt_eval_count INT,
+    prompt_eval_duration FLOAT,
+    timestamp DATETIME
+);
+CREATE INDEX IF NOT EXISTS benchmark_results_model ON benchmark_results (model);
+CREATE INDEX IF NOT EXISTS benchmark_results_prompt_id ON benchmark_results (prompt_id);
+CREATE INDEX IF NOT EXISTS benchmark_results_pair ON benchmark_results (model, prompt_id, options);
+CREATE INDEX IF NOT EXISTS benchmark_results_run_id ON benchmark_results (run_id);
+
+-- Table to store embedding benchmark results, one row per /api/embed batch
+CREATE TABLE IF NOT EXISTS embedding_results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INT,
+    model VARCHAR(100) NOT NULL,
+    batch_size INT NOT NULL,
+    input_count INT,
+    success BOOLEAN NOT NULL,
+    error TEXT,
+    total_duration FLOAT,
+    load_duration FLOAT,
+    prompt_eval_count INT,
+    embedding_length INT,
+    timestamp DATETIME
+);
+CREATE INDEX IF NOT EXISTS embedding_results_model ON embedding_results (model, batch_size);
+
+-- Table to store conversation benchmark turns
+CREATE TABLE IF NOT EXISTS conversation_results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INT,
+    model VARCHAR(100) NOT NULL,
+    conversation VARCHAR(100) NOT NULL,
+    turn INT NOT NULL,
+    mode VARCHAR(8) NOT NULL,
+    success BOOLEAN NOT NULL,
+    error TEXT,
+    total_duration FLOAT,
+    eval_count INT,
+    eval_duration FLOAT,
+    prompt_eval_count INT,
+    prompt_eval_duration FLOAT,
+    timestamp DATETIME
+);
+CREATE INDEX IF NOT EXISTS conversation_results_model ON conversation_results (model, turn);
+
+-- Table to store compressed response bodies
+CREATE TABLE IF NOT EXISTS benchmark_responses (
+    result_id INTEGER PRIMARY KEY REFERENCES benchmark_results(id),
+    codec VARCHAR(8) NOT NULL,
+    response_body MEDIUMBLOB
+);
+
+-- Table to store per-token arrival times of streamed generations (--trace-tokens)
+CREATE TABLE IF NOT EXISTS benchmark_token_traces (
+    result_id INTEGER PRIMARY KEY REFERENCES benchmark_results(id),
+    token_count INT NOT NULL,
+    trace MEDIUMBLOB NOT NULL
+);
+
+-- Job queue shared by benchmark.py --worker processes on this host
+CREATE TABLE IF NOT EXISTS benchmark_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sweep VARCHAR(100) NOT NULL,
+    model VARCHAR(100) NOT NULL,
+    options TEXT,
+    prompt_id INT NOT NULL REFERENCES prompts(id),
+    status VARCHAR(16) NOT NULL DEFAULT 'pending',
+    worker VARCHAR(100),
+    lease_expires DATETIME,
+    attempts INT NOT NULL DEFAULT 0,
+    result_id INT,
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS benchmark_jobs_lease ON benchmark_jobs (sweep, status, lease_expires);
+CREATE INDEX IF NOT EXISTS benchmark_jobs_model ON benchmark_jobs (sweep, model, status);
+CREATE TRIGGER IF NOT EXISTS benchmark_jobs_updated_at AFTER UPDATE ON benchmark_jobs
+BEGIN
+    UPDATE benchmark_jobs SET updated_at = datetime('now', 'localtime') WHERE id = NEW.id;
+END;
+
+-- Table to store Gemini evaluations (created by gemini_evaluate.py on MySQL)
+CREATE TABLE IF NOT EXISTS evaluation_results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    benchmark_result_id INT NOT NULL REFERENCES benchmark_results(id),
+    accuracy_score INT,
+    accuracy_justification TEXT,
+    completeness_score INT,
+    completeness_justification TEXT,
+    clarity_score INT,
+    clarity_justification TEXT,
+    domain_expertise_score INT,
+    domain_expertise_justification TEXT,
+    helpfulness_score INT,
+    helpfulness_justification TEXT,
+    overall_score DECIMAL(3,2),
+    overall_assessment TEXT,
+    key_strengths JSON,
+    key_weaknesses JSON,
+    evaluation_timestamp DATETIME DEFAULT (datetime('now', 'localtime'))
+);
+
+-- Table to store model metadata
+CREATE TABLE IF NOT EXISTS model_metadata (
+    model_name VARCHAR(100) PRIMARY KEY,
+    architecture VARCHAR(50),
+    parameters VARCHAR(20),
+    context_length INT,
+    embedding_length INT,
+    quantization VARCHAR(20),
+    stop_tokens TEXT,
+    license_text TEXT,
+    release_date DATE,
+    created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+
+-- Identity of this database file in the sync_map of the MySQL databases it
+-- is copied to by benchmark.py --sync, or its exports are imported into (one
+-- row, created on the first --sync or --export)
+CREATE TABLE IF NOT EXISTS sync_source (
+    source CHAR(36) PRIMARY KEY
+);
+
+-- Row id in another database -> row id here of everything copied in by
+-- benchmark.py --import, per source database. Written in the same transaction
+-- as the copied rows, so repeated imports only add new rows
+CREATE TABLE IF NOT EXISTS sync_map (
+    source CHAR(36) NOT NULL,
+    table_name VARCHAR(64) NOT NULL,
+    local_id INT NOT NULL,
+    remote_id INT NOT NULL,
+    PRIMARY KEY (source, table_name, local_id)
+);
+
+-- Sample data for the prompts table
+INSERT INTO prompts (prompt_text, category, tags) VALUES
+('Explain quantum computing in simple terms', 'Education', 'science,physics,quantum'),
+('Write a short story about a robot discovering emotions', 'Creative', 'fiction,robot,emotions'),
+('What are the key differences between Python and JavaScript?', 'Programming', 'python,javascript,comparison'),
+('Create a meal plan for a vegetarian athlete', 'Health', 'diet,nutrition,vegetarian,athlete'),
+('Explain the implications of artificial general intelligence', 'AI', 'agi,future,ethics');
@@ -0,0 +1,250 @@
+"""
+Database connections for the LLM benchmark tools.
+
+connect() returns a mysql.connector connection, or with an 'sqlite' entry in
+the configuration a SQLiteConnection: an embedded database file for runs on
+a single host without a MySQL server. SQLiteConnection offers the subset of
+the mysql.connector API used by the tools (dictionary and unbuffered
+cursors, %s parameters, lastrowid, column_names) and translates the MySQL
+constructs in their queries, so the same SQL runs on both backends.
+
+The SQLite database uses WAL journaling, so readers (reports, evaluators)
+do not block the writer, and synchronous=NORMAL, so a commit does not wait
+for an fsync. With commit_batch > 1, commit() only ends the transaction
+every commit_batch calls (or after COMMIT_INTERVAL seconds), grouping the
+result writes of a run into fewer transactions.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from datetime import date, datetime
+from functools import lru_cache
+
+import mysql.connector
+
+SQLITE_SCHEMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema_sqlite.sql')
+# Longest time a deferred commit may wait for the rest of its batch, in seconds
+COMMIT_INTERVAL = 2.0
+# Configuration keys that only apply to SQLite
+SQLITE_OPTIONS = ('sqlite', 'commit_batch')
+
+# Errors raised by either backend
+Error = (mysql.connector.Error, sqlite3.Error)
+
+# Store datetimes the way MySQL prints them and read DATETIME/TIMESTAMP/DATE
+# columns back as datetime objects, like mysql.connector does
+sqlite3.register_adapter(datetime, lambda value: value.strftime('%Y-%m-%d %H:%M:%S'))
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+
+
+def _convert_datetime(value):
+    try:
+        return datetime.fromisoformat(value.decode())
+    except ValueError:
+        return value.decode()
+
+
+sqlite3.register_converter('DATETIME', _convert_datetime)
+sqlite3.register_converter('TIMESTAMP', _convert_datetime)
+sqlite3.register_converter('DATE', lambda value: date.fromisoformat(value.decode()))
+
+# MySQL construct -> SQLite equivalent, applied in order
+TRANSLATIONS = [
+    (re.compile(r'NOW\(\)\s*\+\s*INTERVAL\s+(%s|\d+)\s+SECOND', re.I), r"datetime('now', 'localtime', \1 || ' seconds')"),
+    (re.compile(r'NOW\(\)', re.I), "datetime('now', 'localtime')"),
+    (re.compile(r'<=>'), 'IS'),
+    (re.compile(r'INSERT\s+IGNORE', re.I), 'INSERT OR IGNORE'),
+    (re.compile(r'ON\s+DUPLICATE\s+KEY\s+UPDATE', re.I), 'ON CONFLICT DO UPDATE SET'),
+    (re.compile(r'VALUES\(`?(\w+)`?\)', re.I), r'excluded.\1'),
+    (re.compile(r'SHOW\s+COLUMNS\s+FROM\s+`?(\w+)`?', re.I), r"SELECT name AS Field, type AS Type FROM pragma_table_info('\1')"),
+    (re.compile(r'\bINT\s+AUTO_INCREMENT\s+PRIMARY\s+KEY', re.I), 'INTEGER PRIMARY KEY AUTOINCREMENT'),
+    (re.compile(r'\)\s*ENGINE\s*=[^)]*$', re.I), ')'),
+    (re.compile(r'%s'), '?'),
+]
+LOCKING_READ = re.compile(r'\s+FOR\s+UPDATE(\s+SKIP\s+LOCKED)?', re.I)
+# Quoted string literals, which are never translated
+STRING_LITERAL = re.compile(r"""('(?:[^'\\]|\\.|'')*'|"(?:[^"\\]|\\.|"")*")""")
+
+
+@lru_cache(maxsize=256)
+def translate(query):
+    """
+    Rewrite a MySQL query for SQLite.
+
+    Only the SQL outside quoted string literals is rewritten, so a literal
+    such as 'NOW()' or '%s' reaches SQLite unchanged. Values are meant to be
+    passed as parameters anyway.
+
+    Returns:
+        Tuple (query, locking) where locking tells whether the query was a
+        SELECT ... FOR UPDATE, which SQLite runs in a write (IMMEDIATE) transaction
+    """
+    # Literals end up at the odd indexes
+    parts = STRING_LITERAL.split(query)
+    locks = 0
+    for i in range(0, len(parts), 2):
+        parts[i], count = LOCKING_READ.subn('', parts[i])
+        locks += count
+        for pattern, replacement in TRANSLATIONS:
+            parts[i] = pattern.sub(replacement, parts[i])
+    return ''.join(parts), locks > 0
+
+
+def _sha2(text, bits):
+    if text is None or bits != 256:
+        return None
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _dict_row(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class SQLiteCursor:
+    """mysql.connector style cursor over a SQLiteConnection."""
+
+    def __init__(self, connection, dictionary=False):
+        self.connection = connection
+        self._cursor = connection.sqlite.cursor()
+        if dictionary:
+            self._cursor.row_factory = _dict_row
+
+    def execute(self, query, params=()):
+        query, locking = translate(query)
+        if locking:
+            self.connection.begin_immediate()
+        self._cursor.execute(query, params)
+
+    def executemany(self, query, seq_params):
+        self._cursor.executemany(translate(query)[0], seq_params)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=1):
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def column_names(self):
+        return tuple(column[0] for column in self._cursor.description or ())
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """mysql.connector style connection to an embedded SQLite database file."""
+
+    def __init__(self, path, commit_batch=1, autocommit=False):
+        """
+        Open (and on first use create) a SQLite benchmark database.
+
+        Args:
+            path: Database file
+            commit_batch: Number of commit() calls grouped into one transaction
+            autocommit: Whether every statement commits on its own
+        """
+        self.path = path
+        self.commit_batch = commit_batch
+        self.sqlite = sqlite3.connect(
+            path,
+            timeout=30,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            isolation_level=None if autocommit else 'DEFERRED'
+        )
+        self.sqlite.execute("PRAGMA journal_mode=WAL")
+        self.sqlite.execute("PRAGMA synchronous=NORMAL")
+        self.sqlite.create_function('SHA2', 2, _sha2, deterministic=True)
+        self.pending = 0
+        self.pending_since = None
+        # Set while a SELECT ... FOR UPDATE transaction is open, its commit is never deferred
+        self.locked = False
+
+        if self.sqlite.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'prompts'").fetchone()[0] == 0:
+            with open(SQLITE_SCHEMA, encoding='utf-8') as f:
+                self.sqlite.executescript(f.read())
+
+    def cursor(self, dictionary=False, buffered=None):
+        return SQLiteCursor(self, dictionary)
+
+    def is_connected(self):
+        return True
+
+    def begin_immediate(self):
+        """Start a write transaction, the SQLite counterpart of MySQL row locks."""
+        if self.sqlite.in_transaction:
+            self.flush()
+        self.sqlite.execute("BEGIN IMMEDIATE")
+        self.locked = True
+
+    def commit(self):
+        """Commit, or defer the commit until commit_batch calls or COMMIT_INTERVAL seconds add up."""
+        if self.pending_since is None:
+            self.pending_since = time.monotonic()
+        self.pending += 1
+        if (self.locked or self.pending >= self.commit_batch
+                or time.monotonic() - self.pending_since >= COMMIT_INTERVAL):
+            self.flush()
+
+    def flush(self):
+        """Commit deferred work now."""
+        self.sqlite.commit()
+        self.pending = 0
+        self.pending_since = None
+        self.locked = False
+
+    def rollback(self):
+        self.sqlite.rollback()
+        self.pending = 0
+        self.pending_since = None
+        self.locked = False
+
+    def close(self):
+        if self.pending:
+            self.flush()
+        self.sqlite.close()
+
+
+def connect(db_config):
+    """
+    Open a database connection.
+
+    Args:
+        db_config: mysql.connector configuration, or a configuration with an
+            'sqlite' database file (and optional 'commit_batch')
+
+    Returns:
+        mysql.connector connection or SQLiteConnection
+    """
+    if db_config.get('sqlite'):
+        return SQLiteConnection(
+            db_config['sqlite'],
+            db_config.get('commit_batch', 1),
+            db_config.get('autocommit', False)
+        )
+    return mysql.connector.connect(**{key: value for key, value in db_config.items() if key not in SQLITE_OPTIONS})
+
+
+def database_name(db_config):
+    """Name of the configured database for messages: the SQLite file or the MySQL database."""
+    return db_config.get('sqlite') or db_config.get('database')
@@ -0,0 +1,44 @@
+"""
+Per-token timing traces of streamed generations.
+
+With --trace-tokens, run_prompt records when each streamed chunk (one token in
+Ollama) arrives. Traces are kept in the benchmark_token_traces side table as
+little-endian uint32 arrays of microseconds: the first value is the time from
+sending the request to the first token, every following value the gap to the
+previous token. That is 4 bytes per token and NumPy reads a trace with a single
+frombuffer call.
+"""
+import struct
+from typing import List
+
+TRACE_DTYPE = '<u4'
+MAX_DELTA = 2 ** 32 - 1
+
+
+def encode_trace(arrivals: List[float]) -> bytes:
+    """Delta-encode token arrival times (seconds since the request) as uint32 microseconds."""
+    deltas = []
+    previous = 0
+    for arrival in arrivals:
+        micros = int(round(arrival * 1e6))
+        deltas.append(min(max(micros - previous, 0), MAX_DELTA))
+        previous = micros
+    # Standard size and byte order ('<I' is 4 bytes on every platform, unlike array('I'))
+    return struct.pack(f'<{len(deltas)}I', *deltas)
+
+
+def decode_trace(body: bytes):
+    """Token arrival times in seconds since the request, as a NumPy array."""
+    import numpy as np
+
+    return np.cumsum(np.frombuffer(body, dtype=TRACE_DTYPE), dtype=np.int64) / 1e6
+
+
+def save_trace(connection, result_id: int, arrivals: List[float]) -> None:
+    """Store the token trace of a benchmark result, the caller commits."""
+    cursor = connection.cursor()
+    cursor.execute(
+        "INSERT INTO benchmark_token_traces (result_id, token_count, trace) VALUES (%s, %s, %s)",
+        (result_id, len(arrivals), encode_trace(arrivals))
+    )
+    cursor.close()
@@ -0,0 +1,669 @@
+"""
+Moving benchmark data between databases and files.
+
+export_data streams tables into Parquet or gzipped JSONL files, import_data
+loads such files into another database, import_prompts reads prompt lists and
+sync_data copies the results of a SQLite database into MySQL. Rows copied by
+import_data and sync_data get new IDs in the target; the ID they had in the
+source database is kept in the target's sync_map table, keyed by the random
+identity of the source (sync_source table), so copying the same data again
+only adds what is new. Prompts are matched by the SHA-256 of their text.
+
+All functions work on open storage.connect() connections (MySQL or SQLite)
+and raise on errors, LLMBenchmark connects and reports them.
+"""
+import base64
+import gzip
+import hashlib
+import itertools
+import json
+import os
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Tuple
+
+from response_store import compress_response, decompress_response
+
+# Tables handled by --export / --import, in foreign-key order
+EXPORT_TABLES = ['benchmark_runs', 'prompts', 'benchmark_results', 'benchmark_responses', 'benchmark_token_traces',
+                 'embedding_results', 'conversation_results', 'evaluation_results', 'model_metadata']
+EXPORT_BATCH_SIZE = 5000
+# Written next to the exported tables, names the exported database for --import
+EXPORT_MANIFEST = 'manifest.json'
+# Side tables keyed by result_id that --sync copies with benchmark_results
+SYNC_RESULT_TABLES = {
+    'benchmark_responses': ['codec', 'response_body'],
+    'benchmark_token_traces': ['token_count', 'trace'],
+}
+# Tables copied by --sync in foreign-key order, with the columns that point
+# at other synced tables (prompts are matched by content hash)
+SYNC_TABLES = {
+    'benchmark_runs': {},
+    'benchmark_results': {'prompt_id': 'prompts', 'run_id': 'benchmark_runs'},
+    'embedding_results': {'run_id': 'benchmark_runs'},
+    'conversation_results': {'run_id': 'benchmark_runs'},
+    'evaluation_results': {'benchmark_result_id': 'benchmark_results'},
+}
+# Columns identifying a copied row within its batch. Rows are copied with
+# multi-row INSERTs, whose auto-increment IDs may interleave with those of
+# concurrent writers, so the new IDs are looked up by these columns
+SYNC_KEYS = {
+    'benchmark_runs': ['host', 'started_at'],
+    'benchmark_results': ['model', 'prompt_id', 'options', 'timestamp'],
+    'embedding_results': ['model', 'batch_size', 'timestamp'],
+    'conversation_results': ['model', 'conversation', 'turn', 'mode', 'timestamp'],
+    'evaluation_results': ['benchmark_result_id'],
+}
+
+
+def prompt_hash(prompt_text: str) -> str:
+    """Content hash used to deduplicate prompts, equal to MySQL SHA2(prompt_text, 256)."""
+    return hashlib.sha256(prompt_text.encode('utf-8')).hexdigest()
+
+
+def _arrow_type(declared: str):
+    """
+    Map a declared column type to the matching Arrow type.
+
+    Args:
+        declared: Type as reported by SHOW COLUMNS, e.g. 'decimal(3,2)', on
+            SQLite the type written in schema_sqlite.sql
+    """
+    import pyarrow as pa
+
+    declared = declared.lower()
+    if 'blob' in declared or 'binary' in declared:
+        return pa.binary()
+    if declared.startswith(('datetime', 'timestamp')):
+        return pa.timestamp('s')
+    if declared.startswith('date'):
+        return pa.date32()
+    if 'int' in declared or declared.startswith(('bool', 'year')):
+        return pa.int64()
+    if declared.startswith(('float', 'double', 'real', 'decimal', 'numeric')):
+        return pa.float64()
+    return pa.string()
+
+
+def _plain_value(value: Any) -> Any:
+    """Convert driver values (Decimal, bytearray) into plain Python values, binary values stay bytes."""
+    if isinstance(value, bytearray):
+        return bytes(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _string_value(value: Any) -> Any:
+    """Text form of a value written to a Parquet string column (JSON columns may arrive as bytes)."""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    return str(value)
+
+
+def _json_default(value: Any) -> Any:
+    """JSON form of values json cannot write, binary values become {"$binary": base64}."""
+    if isinstance(value, bytes):
+        return {"$binary": base64.b64encode(value).decode('ascii')}
+    return str(value)
+
+
+def _json_value(value: Any) -> Any:
+    """Reverse _json_default for binary values read from a JSONL export."""
+    if isinstance(value, dict) and '$binary' in value:
+        return base64.b64decode(value['$binary'])
+    return value
+
+
+def column_types(cursor, table: str) -> Dict[str, str]:
+    """Return the declared types of the writable (not generated) columns of a table in definition order."""
+    cursor.execute(f"SHOW COLUMNS FROM `{table}`")
+    # Some mysql.connector versions return the Type column as bytes
+    return {row['Field']: _string_value(row['Type']) for row in cursor.fetchall()
+            if 'GENERATED' not in (row.get('Extra') or '').upper()}
+
+
+def table_columns(cursor, table: str) -> List[str]:
+    """Return the names of the writable (not generated) columns of a table in definition order."""
+    return list(column_types(cursor, table))
+
+
+def sync_source(connection) -> str:
+    """Identity of a database in the sync_map of --sync targets and --import destinations, created on first use."""
+    cursor = connection.cursor(dictionary=True)
+    cursor.execute("CREATE TABLE IF NOT EXISTS sync_source (source CHAR(36) PRIMARY KEY)")
+    cursor.execute("SELECT source FROM sync_source")
+    row = cursor.fetchone()
+    if row is None:
+        row = {'source': str(uuid.uuid4())}
+        cursor.execute("INSERT INTO sync_source (source) VALUES (%s)", (row['source'],))
+        connection.commit()
+    cursor.close()
+    return row['source']
+
+
+def _export_table(connection, table: str, path: str, fields: Dict[str, str], batch_size: int) -> int:
+    """
+    Stream one table into a Parquet or gzipped JSONL file.
+
+    Rows are read through an unbuffered (server-side) cursor in batches of
+    batch_size, so memory use does not depend on the size of the table.
+    The Parquet schema follows the declared column types, never the values:
+    SQLite returns e.g. a DECIMAL 4.0 as the integer 4.
+
+    Args:
+        fields: Exported columns mapped to their declared types
+
+    Returns:
+        Number of exported rows
+    """
+    cursor = connection.cursor(buffered=False)
+    if table == 'benchmark_responses':
+        # Responses are exported decompressed, so files do not depend on the codec
+        cursor.execute("SELECT result_id, codec, response_body FROM benchmark_responses")
+        fields = {'result_id': 'int', 'response_text': 'longtext'}
+        convert = lambda row: (row[0], decompress_response(row[2], row[1]))
+    else:
+        column_list = ', '.join(f"`{column}`" for column in fields)
+        cursor.execute(f"SELECT {column_list} FROM `{table}`")
+        convert = lambda row: tuple(_plain_value(value) for value in row)
+    names = list(fields)
+
+    exported = 0
+    if path.endswith('.parquet'):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([(name, _arrow_type(declared)) for name, declared in fields.items()])
+        with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+            while True:
+                rows = [convert(row) for row in cursor.fetchmany(batch_size)]
+                if not rows:
+                    break
+                arrays = [
+                    pa.array([
+                        _string_value(row[i]) if pa.types.is_string(field.type) else row[i]
+                        for row in rows
+                    ], type=field.type)
+                    for i, field in enumerate(schema)
+                ]
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+                exported += len(rows)
+    else:
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            while True:
+                rows = [convert(row) for row in cursor.fetchmany(batch_size)]
+                if not rows:
+                    break
+                for row in rows:
+                    record = dict(zip(names, row))
+                    f.write(json.dumps(record, default=_json_default, ensure_ascii=False) + "\n")
+                exported += len(rows)
+
+    cursor.close()
+    return exported
+
+
+def export_data(connection, directory: str, database: str, tables: List[str] = None, file_format: str = 'parquet', columns: List[str] = None, exclude_response: bool = False, batch_size: int = EXPORT_BATCH_SIZE) -> None:
+    """
+    Export benchmark tables to Parquet or gzipped JSONL files.
+
+    Binary values (token traces) are written as Parquet binary, or in JSONL
+    as {"$binary": base64} objects. manifest.json records the identity of
+    the exported database, which --import uses to recognize rows it
+    already has.
+
+    Args:
+        connection: Connection to the exported database
+        directory: Output directory, one file per table is written
+        database: Name of the exported database, for the manifest
+        tables: Tables to export, defaults to all of EXPORT_TABLES
+        file_format: 'parquet' or 'jsonl' (gzip compressed)
+        columns: Optional column selection, plain names apply to every table
+            that has them, 'table.column' names to that table only
+        exclude_response: Whether to leave out benchmark_responses
+        batch_size: Number of rows fetched and written at a time
+    """
+    os.makedirs(directory, exist_ok=True)
+    extension = 'parquet' if file_format == 'parquet' else 'jsonl.gz'
+    with open(os.path.join(directory, EXPORT_MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump({
+            "source": sync_source(connection),
+            "database": database,
+            "exported_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }, f, indent=2)
+
+    cursor = connection.cursor(dictionary=True)
+    for table in tables or EXPORT_TABLES:
+        if exclude_response and table == 'benchmark_responses':
+            continue
+        available = column_types(cursor, table)
+        wanted = {c.split('.', 1)[-1] for c in columns or [] if '.' not in c or c.split('.', 1)[0] == table}
+        selected = {c: declared for c, declared in available.items() if c in wanted} or available
+
+        path = os.path.join(directory, f"{table}.{extension}")
+        exported = _export_table(connection, table, path, selected, batch_size)
+        print(f"Exported {exported} rows from {table} to {path}")
+    cursor.close()
+
+
+def _read_batches(path: str, batch_size: int):
+    """Yield lists of row dictionaries from a Parquet or JSONL(.gz) file."""
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield batch.to_pylist()
+    else:
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt', encoding='utf-8') as f:
+            while True:
+                lines = list(itertools.islice(f, batch_size))
+                if not lines:
+                    break
+                yield [{column: _json_value(value) for column, value in json.loads(line).items()}
+                       for line in lines if line.strip()]
+
+
+def _insert_rows(cursor, table: str, columns: List[str], rows: List[Tuple]) -> List[int]:
+    """
+    Insert rows through cursor with one multi-row statement and return their new IDs in row order.
+
+    The IDs are read back by the SYNC_KEYS columns of the table among the
+    rows added after the highest ID seen before the insert; rows with equal
+    keys are matched in insert order.
+    """
+    cursor.execute(f"SELECT COALESCE(MAX(id), 0) AS max_id FROM `{table}`")
+    max_id = cursor.fetchone()['max_id']
+    cursor.executemany(f"""
+        INSERT INTO `{table}` ({', '.join(f'`{c}`' for c in columns)})
+        VALUES ({', '.join(['%s'] * len(columns))})
+    """, rows)
+
+    key_columns = [column for column in SYNC_KEYS[table] if column in columns]
+    positions = [columns.index(column) for column in key_columns]
+    pending = {}
+    for index, row in enumerate(rows):
+        key = tuple(None if row[i] is None else str(row[i]) for i in positions)
+        pending.setdefault(key, []).append(index)
+    for waiting in pending.values():
+        waiting.reverse()
+
+    ids = [None] * len(rows)
+    selected = ''.join(f", `{column}`" for column in key_columns)
+    cursor.execute(f"SELECT id{selected} FROM `{table}` WHERE id > %s ORDER BY id", (max_id,))
+    for row in cursor.fetchall():
+        waiting = pending.get(tuple(None if row[c] is None else str(row[c]) for c in key_columns))
+        if waiting:
+            ids[waiting.pop()] = row['id']
+    if None in ids:
+        raise RuntimeError(f"Could not find the IDs of {ids.count(None)} rows inserted into {table}")
+    return ids
+
+
+def _insert_prompts(cursor, rows: List[Dict[str, Any]]) -> Dict[int, int]:
+    """Add missing prompts through cursor, matched by content hash, and return the row ID -> prompt ID map."""
+    by_hash = {prompt_hash(row['prompt_text']): row for row in rows}
+    if not by_hash:
+        return {}
+    cursor.executemany(
+        "INSERT IGNORE INTO prompts (prompt_text, category, tags) VALUES (%s, %s, %s)",
+        [(row['prompt_text'], row.get('category'), row.get('tags')) for row in by_hash.values()]
+    )
+    ids = {}
+    hashes = list(by_hash)
+    for start in range(0, len(hashes), 1000):
+        chunk = hashes[start:start + 1000]
+        cursor.execute(
+            f"SELECT id, content_hash FROM prompts WHERE content_hash IN ({', '.join(['%s'] * len(chunk))})",
+            chunk
+        )
+        ids.update({row['content_hash']: row['id'] for row in cursor.fetchall()})
+    return {row['id']: ids[prompt_hash(row['prompt_text'])] for row in rows
+            if row.get('id') is not None and prompt_hash(row['prompt_text']) in ids}
+
+
+def _load_sync_map(cursor, source: str, table: str) -> Dict[int, int]:
+    """Source ID -> local ID map of the rows of a table already copied from source."""
+    if source is None:
+        return {}
+    cursor.execute(
+        "SELECT local_id, remote_id FROM sync_map WHERE source = %s AND table_name = %s",
+        (source, table)
+    )
+    return {row['local_id']: row['remote_id'] for row in cursor.fetchall()}
+
+
+def import_data(connection, directory: str, tables: List[str] = None, response_codec: str = 'zlib', batch_size: int = EXPORT_BATCH_SIZE) -> None:
+    """
+    Bulk-load files written by export_data into a database.
+
+    Tables are loaded in EXPORT_TABLES order so references resolve. Like
+    with --sync, rows get new IDs: prompts are matched by content hash,
+    references to other tables are rewritten to the new IDs, and every
+    mapping is recorded in sync_map under the source named in the export's
+    manifest.json, in the same transaction as the rows. Every batch is
+    inserted with multi-row INSERTs, the new IDs are looked up afterwards
+    (see _insert_rows). Importing the same data again, or a later export of
+    the same database, only adds new rows.
+    Rows referring to a prompt or result that is not known are skipped,
+    unknown runs are left out. Responses are compressed with response_codec,
+    including inline response_text from older exports. Existing
+    model_metadata rows are kept.
+
+    Args:
+        connection: Connection to the database to load into
+        directory: Directory containing <table>.parquet or <table>.jsonl.gz files
+        tables: Tables to import, defaults to all files found
+        response_codec: Compression for the imported responses
+        batch_size: Number of rows read per batch
+    """
+    source = None
+    manifest = os.path.join(directory, EXPORT_MANIFEST)
+    if os.path.exists(manifest):
+        with open(manifest, encoding='utf-8') as f:
+            source = json.load(f).get('source')
+    if source is None:
+        print(f"No {EXPORT_MANIFEST} in {directory}: rows are imported as new, importing them again duplicates them")
+
+    cursor = connection.cursor(dictionary=True)
+    id_maps = {}
+    for table in EXPORT_TABLES:
+        if tables and table not in tables:
+            continue
+        candidates = [os.path.join(directory, f"{table}.{ext}") for ext in ('parquet', 'jsonl.gz', 'jsonl')]
+        path = next((c for c in candidates if os.path.exists(c)), None)
+        if path is None:
+            continue
+
+        # Generated columns (prompts.content_hash) are computed by the database
+        writable = set(table_columns(cursor, table))
+        for referenced in set(SYNC_TABLES.get(table, {}).values()) | {table}:
+            if referenced not in id_maps:
+                id_maps[referenced] = _load_sync_map(cursor, source, referenced)
+        if table in SYNC_RESULT_TABLES and 'benchmark_results' not in id_maps:
+            id_maps['benchmark_results'] = _load_sync_map(cursor, source, 'benchmark_results')
+        imported = known = skipped = 0
+        for rows in _read_batches(path, batch_size):
+            if not rows:
+                continue
+            mapping = {}
+            responses = []
+            if table == 'prompts':
+                rows = [row for row in rows if row.get('prompt_text')]
+                known += sum(1 for row in rows if row.get('id') in id_maps['prompts'])
+                mapping = {old: new for old, new in _insert_prompts(cursor, rows).items()
+                           if old not in id_maps['prompts']}
+                imported += len(mapping)
+            elif table in SYNC_RESULT_TABLES or table == 'benchmark_responses':
+                results = id_maps['benchmark_results']
+                resolved = [row for row in rows if row['result_id'] in results]
+                skipped += len(rows) - len(resolved)
+                if table == 'benchmark_responses':
+                    responses = [(results[row['result_id']], row['response_text']) for row in resolved]
+                elif resolved:
+                    columns = [column for column in resolved[0] if column in writable]
+                    cursor.executemany(
+                        f"INSERT IGNORE INTO `{table}` ({', '.join(f'`{c}`' for c in columns)}) VALUES ({', '.join(['%s'] * len(columns))})",
+                        [tuple(results[row[c]] if c == 'result_id' else row.get(c) for c in columns) for row in resolved]
+                    )
+                    imported += cursor.rowcount
+                    known += len(resolved) - cursor.rowcount
+            elif table in SYNC_TABLES:
+                id_map = id_maps[table]
+                columns = [column for column in rows[0] if column in writable and column != 'id']
+                new_rows = []
+                for row in rows:
+                    if row.get('id') is not None and row['id'] in id_map:
+                        known += 1
+                        continue
+                    unresolved = False
+                    for column, referenced in SYNC_TABLES[table].items():
+                        if row.get(column) is not None:
+                            row[column] = id_maps[referenced].get(row[column])
+                            # Runs are optional context, a result needs its prompt
+                            unresolved = unresolved or (row[column] is None and referenced != 'benchmark_runs')
+                    if unresolved:
+                        skipped += 1
+                        continue
+                    new_rows.append(row)
+                if new_rows:
+                    new_ids = _insert_rows(cursor, table, columns, [tuple(row.get(c) for c in columns) for row in new_rows])
+                    for row, new_id in zip(new_rows, new_ids):
+                        if row.get('id') is not None:
+                            mapping[row['id']] = new_id
+                        if table == 'benchmark_results' and row.get('response_text') is not None:
+                            responses.append((new_id, row['response_text']))
+                    imported += len(new_rows)
+            else:
+                columns = [column for column in rows[0] if column in writable]
+                cursor.executemany(f"""
+                    INSERT IGNORE INTO `{table}` ({', '.join(f'`{c}`' for c in columns)})
+                    VALUES ({', '.join(['%s'] * len(columns))})
+                """, [tuple(row.get(c) for c in columns) for row in rows])
+                imported += cursor.rowcount
+                known += len(rows) - cursor.rowcount
+            if responses:
+                cursor.executemany(
+                    "INSERT IGNORE INTO benchmark_responses (result_id, codec, response_body) VALUES (%s, %s, %s)",
+                    [(result_id, response_codec, compress_response(text, response_codec))
+                     for result_id, text in responses if text is not None]
+                )
+                if table == 'benchmark_responses':
+                    imported += cursor.rowcount
+                    known += len(responses) - cursor.rowcount
+            if mapping and source is not None:
+                cursor.executemany(
+                    "INSERT IGNORE INTO sync_map (source, table_name, local_id, remote_id) VALUES (%s, %s, %s, %s)",
+                    [(source, table, old_id, new_id) for old_id, new_id in mapping.items()]
+                )
+            connection.commit()
+            id_maps[table].update(mapping)
+        print(f"Imported {imported} rows into {table} from {path}"
+              f" ({known} already imported, {skipped} skipped for unknown references)")
+    cursor.close()
+
+
+def import_prompts(connection, path: str, batch_size: int = EXPORT_BATCH_SIZE) -> None:
+    """
+    Stream prompts from a JSONL file into the prompts table.
+
+    Each line is a JSON object with 'prompt_text' and optional 'category'
+    and 'tags' (string or list). Prompts are deduplicated by the SHA-256
+    of their text: known prompts keep their ID, and their category and tags
+    are only replaced by values the file gives (a line without 'tags'
+    keeps the stored tags), so re-importing the same file is idempotent.
+
+    Args:
+        connection: Connection to the database to load into
+        path: Path of a .jsonl, .jsonl.gz or .parquet file
+        batch_size: Number of prompts inserted per statement
+    """
+    cursor = connection.cursor(dictionary=True)
+    cursor.execute("SELECT COUNT(*) as count FROM prompts")
+    count_before = cursor.fetchone()['count']
+
+    query = """
+        INSERT INTO prompts (prompt_text, category, tags)
+        VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE category = COALESCE(VALUES(category), category), tags = COALESCE(VALUES(tags), tags)
+    """
+    processed = 0
+    skipped = 0
+    for rows in _read_batches(path, batch_size):
+        batch = {}
+        for row in rows:
+            prompt_text = row.get('prompt_text')
+            if not prompt_text:
+                skipped += 1
+                continue
+            tags = row.get('tags')
+            if isinstance(tags, list):
+                tags = ','.join(str(tag) for tag in tags)
+            batch[prompt_hash(prompt_text)] = (prompt_text, row.get('category'), tags)
+
+        if batch:
+            cursor.executemany(query, list(batch.values()))
+            connection.commit()
+            processed += len(batch)
+            print(f"  - {processed} prompts processed")
+
+    cursor.execute("SELECT COUNT(*) as count FROM prompts")
+    inserted = cursor.fetchone()['count'] - count_before
+    cursor.close()
+    print(f"Imported {processed} prompts from {path}: {inserted} new, {processed - inserted} already known, {skipped} lines without prompt_text skipped")
+
+
+def _sync_table(connection, target, source: str, table: str, id_maps: Dict[str, Dict[int, int]], batch_size: int) -> int:
+    """
+    Copy the rows of a table that have not been synced to the target yet.
+
+    Rows get new IDs in the target, references to other tables are
+    rewritten through id_maps. The new mappings are recorded in the target's
+    sync_map in the same transaction as the copied rows, so a sync that is
+    interrupted never copies a row twice.
+    benchmark_results rows take their response bodies and token traces along.
+
+    Returns:
+        Number of copied rows
+    """
+    cursor = connection.cursor(dictionary=True)
+    target_cursor = target.cursor(dictionary=True)
+    id_map = id_maps[table] = _load_sync_map(target_cursor, source, table)
+    columns = [column for column in table_columns(cursor, table) if column != 'id']
+    # Batches are copied in id order and committed with their mappings
+    last_id = max(id_map, default=0)
+    copied = 0
+    while True:
+        cursor.execute(f"SELECT * FROM `{table}` WHERE id > %s ORDER BY id LIMIT %s", (last_id, batch_size))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+
+        for row in rows:
+            for column, referenced in SYNC_TABLES[table].items():
+                if row[column] is not None:
+                    row[column] = id_maps[referenced].get(row[column])
+        new_ids = _insert_rows(target_cursor, table, columns, [tuple(row[column] for column in columns) for row in rows])
+        mapping = {row['id']: new_id for row, new_id in zip(rows, new_ids)}
+        if table == 'benchmark_results':
+            for side_table, side_columns in SYNC_RESULT_TABLES.items():
+                cursor.execute(
+                    f"SELECT result_id, {', '.join(side_columns)} FROM {side_table} WHERE result_id IN ({', '.join(['%s'] * len(mapping))})",
+                    list(mapping)
+                )
+                target_cursor.executemany(
+                    f"INSERT INTO {side_table} (result_id, {', '.join(side_columns)}) VALUES ({', '.join(['%s'] * (len(side_columns) + 1))})",
+                    [(mapping[row['result_id']], *(row[c] for c in side_columns)) for row in cursor.fetchall()]
+                )
+        target_cursor.executemany(
+            "INSERT INTO sync_map (source, table_name, local_id, remote_id) VALUES (%s, %s, %s, %s)",
+            [(source, table, local_id, remote_id) for local_id, remote_id in mapping.items()]
+        )
+        target.commit()
+        id_map.update(mapping)
+        last_id = rows[-1]['id']
+        copied += len(rows)
+    target_cursor.close()
+    cursor.close()
+    return copied
+
+
+def _migrate_local_sync_map(connection, target, source: str, target_name: str) -> None:
+    """
+    Move the mappings kept in the SQLite file by earlier versions of --sync to the target.
+
+    Once no target is left in it, the old table is replaced by the current
+    sync_map, which records rows imported into the SQLite file.
+    """
+    cursor = connection.cursor(dictionary=True)
+    cursor.execute("SELECT COUNT(*) as count FROM pragma_table_info('sync_map') WHERE name = 'target'")
+    if cursor.fetchone()['count'] == 0:
+        cursor.close()
+        return
+    cursor.execute("SELECT table_name, local_id, remote_id FROM sync_map WHERE target = %s", (target_name,))
+    rows = cursor.fetchall()
+    if rows:
+        target_cursor = target.cursor()
+        target_cursor.executemany(
+            "INSERT IGNORE INTO sync_map (source, table_name, local_id, remote_id) VALUES (%s, %s, %s, %s)",
+            [(source, row['table_name'], row['local_id'], row['remote_id']) for row in rows]
+        )
+        target.commit()
+        target_cursor.close()
+        cursor.execute("DELETE FROM sync_map WHERE target = %s", (target_name,))
+        connection.commit()
+        print(f"Moved {len(rows)} earlier sync mappings to the target database")
+    cursor.execute("SELECT COUNT(*) as count FROM sync_map")
+    if cursor.fetchone()['count'] == 0:
+        cursor.execute("DROP TABLE sync_map")
+        cursor.execute("""
+            CREATE TABLE sync_map (
+                source CHAR(36) NOT NULL,
+                table_name VARCHAR(64) NOT NULL,
+                local_id INT NOT NULL,
+                remote_id INT NOT NULL,
+                PRIMARY KEY (source, table_name, local_id)
+            )
+        """)
+        connection.commit()
+    cursor.close()
+
+
+def sync_data(connection, target, target_name: str, batch_size: int = EXPORT_BATCH_SIZE) -> None:
+    """
+    Copy new results from a SQLite database into a MySQL database.
+
+    Rows already synced to the same target are skipped, so syncing after
+    every run only copies what is new. Copied rows get fresh IDs in MySQL,
+    which keeps the local -> MySQL ID of every copied row in its sync_map
+    table, keyed by a random identity stored in the SQLite file. Prompts
+    are matched by content hash, run end times are updated and model
+    metadata is upserted. The job queue stays local.
+
+    Args:
+        connection: Connection to the SQLite database
+        target: Connection to the target MySQL database
+        target_name: host:port/database of the target, as recorded by earlier versions
+        batch_size: Number of rows copied per transaction
+    """
+    cursor = connection.cursor(dictionary=True)
+    target_cursor = target.cursor(dictionary=True)
+    source = sync_source(connection)
+    _migrate_local_sync_map(connection, target, source, target_name)
+
+    cursor.execute("SELECT id, prompt_text, category, tags FROM prompts")
+    id_maps = {'prompts': _insert_prompts(target_cursor, cursor.fetchall())}
+    target.commit()
+    print(f"Synced {len(id_maps['prompts'])} prompts")
+
+    for table in SYNC_TABLES:
+        copied = _sync_table(connection, target, source, table, id_maps, batch_size)
+        print(f"Synced {copied} new rows of {table}")
+
+    # Runs still going on at an earlier sync
+    cursor.execute("SELECT id, finished_at FROM benchmark_runs WHERE finished_at IS NOT NULL")
+    finished = [(row['finished_at'], id_maps['benchmark_runs'][row['id']])
+                for row in cursor.fetchall() if row['id'] in id_maps['benchmark_runs']]
+    if finished:
+        target_cursor.executemany(
+            "UPDATE benchmark_runs SET finished_at = %s WHERE id = %s AND finished_at IS NULL",
+            finished
+        )
+
+    cursor.execute("SELECT * FROM model_metadata")
+    metadata = cursor.fetchall()
+    if metadata:
+        columns = list(metadata[0])
+        target_cursor.executemany(f"""
+            INSERT INTO model_metadata ({', '.join(f'`{c}`' for c in columns)})
+            VALUES ({', '.join(['%s'] * len(columns))})
+            ON DUPLICATE KEY UPDATE {', '.join(f'`{c}` = VALUES(`{c}`)' for c in columns[1:])}
+        """, [tuple(row[c] for c in columns) for row in metadata])
+    target.commit()
+    target_cursor.close()
+    cursor.close()
+    print(f"Synced metadata of {len(metadata)} models")